@@ -0,0 +1,138 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from api.answer_key import get_answer_key
+from api.grading import grade_participants
+from api.leaderboard import apply_series_deltas
+from api.models import Answer, PendingAnswer, Result
+from api.ranking import invalidate_ranking
+from api.services import save_exam_results
+
+
+def buffer_answers(participant_id: int, choices):
+    """
+    Append the participant's validated choices to the pending answer log.
+
+    The answers are acknowledged once queued; ``flush_pending_answers``
+    applies them to ``Answer`` later.
+    """
+    return PendingAnswer.objects.bulk_create(
+        [
+            PendingAnswer(
+                participant_id=participant_id,
+                question_id=choice.question_id,
+                choice_id=choice.id,
+            )
+            for choice in choices
+        ]
+    )
+
+
+def flush_pending_answers(batch_size: int = 1000) -> int:
+    """
+    Apply the oldest pending answers to ``Answer`` and remove them from the log.
+
+    Only the latest entry per (participant, question) is written, with one
+    bulk upsert. With incremental scoring the affected results are regraded
+    and saved with one query and one upsert per exam, and only their score
+    changes are added to the series standings. Concurrent flushers skip the
+    entries another one holds, and leave a participant for later while an
+    older entry of theirs is still being applied. Returns the number of
+    pending entries applied.
+    """
+    with transaction.atomic():
+        pending = list(
+            PendingAnswer.objects.select_for_update(skip_locked=True, of=("self",))
+            .order_by("id")
+            .values("id", "participant_id", "question_id", "choice_id", "question__exam_id")
+            [:batch_size]
+        )
+        if not pending:
+            return 0
+
+        # Entradas anteriores presas por outro flusher devem ser aplicadas antes
+        busy = set(
+            PendingAnswer.objects.filter(
+                participant_id__in={row["participant_id"] for row in pending},
+                id__lt=pending[-1]["id"],
+            )
+            .exclude(id__in=[row["id"] for row in pending])
+            .values_list("participant_id", flat=True)
+        )
+        pending = [row for row in pending if row["participant_id"] not in busy]
+        if not pending:
+            return 0
+
+        # A ordem por id garante que a última resposta enviada prevaleça
+        latest = {(row["participant_id"], row["question_id"]): row for row in pending}
+        Answer.objects.bulk_create(
+            [
+                Answer(
+                    participant_id=row["participant_id"],
+                    question_id=row["question_id"],
+                    choice_id=row["choice_id"],
+                )
+                for row in latest.values()
+            ],
+            update_conflicts=True,
+            unique_fields=["participant", "question"],
+            update_fields=["choice", "updated_at"],
+        )
+        PendingAnswer.objects.filter(id__in=[row["id"] for row in pending]).delete()
+
+        if settings.INCREMENTAL_SCORING:
+            participants_by_exam = defaultdict(set)
+            for row in latest.values():
+                participants_by_exam[row["question__exam_id"]].add(row["participant_id"])
+
+            for exam_id, participant_ids in participants_by_exam.items():
+                answer_key = get_answer_key(exam_id)
+                previous = {
+                    participant_id: (score, max_score)
+                    for participant_id, score, max_score in Result.objects.select_for_update()
+                    .filter(exam_id=exam_id, participant_id__in=participant_ids)
+                    .order_by("participant_id")
+                    .values_list("participant_id", "score", "max_score")
+                }
+                scores = grade_participants(exam_id, answer_key, participant_ids)
+                save_exam_results(exam_id, scores, len(answer_key), refresh_ranking=False)
+                # Só as variações do lote entram nas séries, sem reconstruí-las
+                apply_series_deltas(exam_id, {
+                    participant_id: (
+                        score - previous.get(participant_id, (0, 0))[0],
+                        len(answer_key) - previous.get(participant_id, (0, 0))[1],
+                    )
+                    for participant_id, score in scores.items()
+                })
+                invalidate_ranking(exam_id)
+
+    return len(pending)
+
+
+def get_participant_answers(participant_id: int, exam_id: int) -> list:
+    """
+    Return the participant's answers to an exam, pending ones included.
+
+    Pending entries override the stored answers, so participants read their
+    own writes before the flusher catches up.
+    """
+    sheet = {
+        row["question_id"]: {**row, "pending": False}
+        for row in Answer.objects.filter(
+            participant_id=participant_id, question__exam_id=exam_id
+        ).values("question_id", "choice_id", "updated_at")
+    }
+    for row in (
+        PendingAnswer.objects.filter(participant_id=participant_id, question__exam_id=exam_id)
+        .order_by("id")
+        .values("question_id", "choice_id", "created_at")
+    ):
+        sheet[row["question_id"]] = {
+            "question_id": row["question_id"],
+            "choice_id": row["choice_id"],
+            "updated_at": row["created_at"],
+            "pending": True,
+        }
+    return [sheet[question_id] for question_id in sorted(sheet)]
@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.db.models import FilteredRelation, Q
+
+from api.cache import bump_version, get_version
+from api.models import Question
+
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+
+# Cópia local por processo: exam_id -> (versão, gabarito)
+_local_answer_keys = {}
+
+
+def _namespace(exam_id: int) -> str:
+    return f"answer_key:{exam_id}"
+
+
+def build_answer_key(exam_id: int) -> dict:
+    """
+    Build the answer key of an exam from the database.
+
+    Maps every question id of the exam to the frozenset of its correct
+    choice ids, empty when the question has no correct choice. Answering any
+    of them scores the question.
+    """
+    correct = {}
+    for question_id, choice_id in (
+        Question.objects.filter(exam_id=exam_id)
+        .annotate(correct=FilteredRelation("choices", condition=Q(choices__is_correct=True)))
+        .values_list("id", "correct__id")
+    ):
+        correct.setdefault(question_id, set())
+        if choice_id is not None:
+            correct[question_id].add(choice_id)
+    return {question_id: frozenset(ids) for question_id, ids in correct.items()}
+
+
+def correct_choice_ids(answer_key: dict) -> set:
+    """
+    Return every correct choice id of an answer key.
+    """
+    return set().union(*answer_key.values())
+
+
+def get_answer_key(exam_id: int) -> dict:
+    """
+    Return the answer key of an exam, rebuilding it lazily when invalidated.
+
+    Looks in the process-local copy first, then in the shared cache and only
+    then in the database.
+    """
+    version = get_version(_namespace(exam_id))
+
+    local = _local_answer_keys.get(exam_id)
+    if local is not None and local[0] == version:
+        return local[1]
+
+    cache_key = f"{_namespace(exam_id)}:{version}"
+    answer_key = cache.get(cache_key)
+    if answer_key is None:
+        answer_key = build_answer_key(exam_id)
+        cache.set(cache_key, answer_key, ANSWER_KEY_TIMEOUT)
+
+    _local_answer_keys[exam_id] = (version, answer_key)
+    return answer_key
+
+
+def invalidate_answer_key(exam_id: int) -> None:
+    """
+    Drop the cached answer key of an exam.
+
+    ``bump_version`` moves the version again once the transaction commits,
+    so a key rebuilt meanwhile from uncommitted data is not kept. Other
+    processes only see the invalidation when the cache backend is shared.
+    """
+    _local_answer_keys.pop(exam_id, None)
+    bump_version(_namespace(exam_id))
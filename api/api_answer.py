@@ -1,48 +1,152 @@
+from django.conf import settings
+from django.db import IntegrityError
 from django.http import Http404
 from ninja import NinjaAPI
+from ninja.decorators import decorate_view
 from django.shortcuts import get_object_or_404
 
+from api.answer_buffer import buffer_answers, get_participant_answers
 from api.api_auth import AuthBearer
-from .models import Answer, Participant, Question, Choice
-from .schemas import AnswerSchema, CreateAnswerSchema, UpdateAnswerSchema
+from api.enrollment import get_request_exam_ids, get_request_participant_id_or_404
+from api.idempotency import idempotent
+from .models import Answer, Question, Choice
+from .schemas import (
+    AnswerSchema,
+    AnswerSheetSchema,
+    CreateAnswerSchema,
+    PendingAnswerSchema,
+    SheetAnswerSchema,
+    UpdateAnswerSchema,
+)
+from .services import save_answers
 import logging
 
 router = NinjaAPI(urls_namespace="answer")
 logger = logging.getLogger(__name__)
 
 
-@router.post("/", response={201: AnswerSchema, 400: dict}, auth=AuthBearer())
+def _write_answers(write, participant_id: int, *args):
+    """
+    Run an answer write for the participant of the request's token.
+
+    The participant id may come from the token claims, so a participant
+    removed since then is reported as not found instead of a server error.
+    """
+    try:
+        return write(participant_id, *args)
+    except IntegrityError:
+        raise Http404("No Participant matches the given query.")
+
+
+@router.post(
+    "/", response={201: AnswerSchema, 202: PendingAnswerSchema, 400: dict}, auth=AuthBearer()
+)
+@decorate_view(idempotent)
 def create_answer(request, data: CreateAnswerSchema):
     """
     Create an answer for the authenticated participant.
+
+    In write-behind mode the answer is queued and acknowledged with 202.
     """
-    participant = get_object_or_404(Participant, user=request.user)
+    participant_id = get_request_participant_id_or_404(request)
     question = get_object_or_404(Question, id=data.question_id)
     choice = get_object_or_404(Choice, id=data.choice_id, question=question)
 
-    if question.exam not in participant.exams.all():
+    if question.exam_id not in get_request_exam_ids(request):
         return 400, {"error": "You are not allowed to answer this question."}
 
-    answer, created = Answer.objects.update_or_create(
-        participant=participant,
-        question=question,
-        defaults={"choice": choice},
-    )
+    if settings.ANSWER_WRITE_BEHIND:
+        [pending] = _write_answers(buffer_answers, participant_id, [choice])
+        return 202, pending
+
+    [answer] = _write_answers(save_answers, participant_id, question.exam_id, [choice])
     return 201, answer
 
 
-@router.put("/{answer_id}/", response={200: AnswerSchema, 404: dict}, auth=AuthBearer())
+@router.post(
+    "/batch/",
+    response={201: list[AnswerSchema], 202: list[PendingAnswerSchema], 400: dict},
+    auth=AuthBearer(),
+)
+@decorate_view(idempotent)
+def submit_answer_sheet(request, data: AnswerSheetSchema):
+    """
+    Create or replace a whole answer sheet for the authenticated participant.
+
+    Every (question, choice) pair is validated against the exam in a single
+    query and the sheet is written with one upsert on (participant, question).
+    """
+    participant_id = get_request_participant_id_or_404(request)
+
+    if data.exam_id not in get_request_exam_ids(request):
+        return 400, {"error": "You are not allowed to answer this exam."}
+
+    sheet = {item.question_id: item.choice_id for item in data.answers}
+    if len(sheet) != len(data.answers):
+        return 400, {"error": "Each question can only be answered once."}
+    if not sheet:
+        return 400, {"error": "The answer sheet is empty."}
+
+    choices = {
+        choice.id: choice
+        for choice in Choice.objects.filter(
+            id__in=sheet.values(), question__exam_id=data.exam_id
+        ).only("id", "question_id", "is_correct")
+    }
+    invalid = [
+        question_id for question_id, choice_id in sheet.items()
+        if choice_id not in choices or choices[choice_id].question_id != question_id
+    ]
+    if invalid:
+        return 400, {
+            "error": "Invalid question or choice for this exam.",
+            "question_ids": sorted(invalid),
+        }
+
+    if settings.ANSWER_WRITE_BEHIND:
+        pending = _write_answers(buffer_answers, participant_id, list(choices.values()))
+        return 202, sorted(pending, key=lambda answer: answer.question_id)
+
+    answers = _write_answers(save_answers, participant_id, data.exam_id, list(choices.values()))
+    return 201, sorted(answers, key=lambda answer: answer.question_id)
+
+
+@router.get("/exam/{exam_id}/", response={200: list[SheetAnswerSchema], 400: dict}, auth=AuthBearer())
+def list_my_answers(request, exam_id: int):
+    """
+    List the authenticated participant's answers to an exam.
+
+    Answers still queued in write-behind mode are included and flagged as
+    pending.
+    """
+    participant_id = get_request_participant_id_or_404(request)
+
+    if exam_id not in get_request_exam_ids(request):
+        return 400, {"error": "You are not allowed to answer this exam."}
+
+    return get_participant_answers(participant_id, exam_id)
+
+
+@router.put(
+    "/{answer_id}/", response={200: AnswerSchema, 202: PendingAnswerSchema, 404: dict}, auth=AuthBearer()
+)
 def update_answer(request, answer_id: int, data: UpdateAnswerSchema):
     """
     Update an existing answer for the authenticated participant.
     """
-    participant = get_object_or_404(Participant, user=request.user)
-    answer = get_object_or_404(Answer, id=answer_id, participant=participant)
+    participant_id = get_request_participant_id_or_404(request)
+
+    answer = get_object_or_404(
+        Answer.objects.select_related("question"),
+        id=answer_id,
+        participant_id=participant_id,
+    )
+    choice = get_object_or_404(
+        Choice, id=data.choice_id, question=answer.question)
 
-    if data.choice_id:
-        choice = get_object_or_404(
-            Choice, id=data.choice_id, question=answer.question)
-        answer.choice = choice
+    if settings.ANSWER_WRITE_BEHIND:
+        [pending] = _write_answers(buffer_answers, participant_id, [choice])
+        return 202, pending
 
-    answer.save()
+    [answer] = _write_answers(save_answers, participant_id, answer.question.exam_id, [choice])
     return answer
@@ -1,12 +1,28 @@
+import hashlib
+import time
+
+from django.conf import settings
 from ninja import NinjaAPI
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate
+from django.contrib.auth import authenticate, get_user_model
+from django.shortcuts import get_object_or_404
 from ninja import Schema
 from ninja.security import HttpBearer
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTStatelessUserAuthentication,
+)
+
+from api.cache import BoundedTTLCache
+from api.models import Exam, User
+from api.revocation import is_revoked, revoke_token
+from api.tokens import issue_cohort_tokens, issue_tokens
 
 router = NinjaAPI(urls_namespace="auth")
 
+TOKEN_CACHE_MAX_ENTRIES = 10_000
+
 
 class TokenSchema(Schema):
     access: str
@@ -22,16 +38,39 @@ class RefreshTokenSchema(Schema):
     refresh: str
 
 
+class CohortTokenSchema(Schema):
+    participant_id: int
+    username: str
+    access: str
+    refresh: str
+
+
 class AuthBearer(HttpBearer):
+    # Tokens já validados: sha256(token) -> token validado, mantido até o exp
+    token_cache = BoundedTTLCache(TOKEN_CACHE_MAX_ENTRIES, ttl=0)
+
     def authenticate(self, request, token):
+        # No modo stateless o usuário vem das claims do token, sem consultar o banco
+        if settings.STATELESS_JWT_AUTH:
+            authentication = JWTStatelessUserAuthentication()
+        else:
+            authentication = JWTAuthentication()
+
+        key = hashlib.sha256(token.encode()).hexdigest()
+        validated_token = self.token_cache.get(key)
         try:
-            validated_token = JWTAuthentication().get_validated_token(token)
-            user = JWTAuthentication().get_user(validated_token)
-            request.user = user
-            return user
+            if validated_token is None:
+                validated_token = authentication.get_validated_token(token)
+                self.token_cache.set(key, validated_token, validated_token["exp"] - time.time())
+            # Token já verificado em cache: só resta obter o usuário do modo configurado
+            user = authentication.get_user(validated_token)
         except Exception:
             return None
 
+        request.user = user
+        request.auth_token = validated_token
+        return user
+
 
 @router.post("/login", response={200: TokenSchema, 401: dict})
 def login(request, data: AuthSchema):
@@ -40,11 +79,7 @@ def login(request, data: AuthSchema):
     """
     user = authenticate(username=data.username, password=data.password)
     if user:
-        refresh = RefreshToken.for_user(user)
-        return {
-            "access": str(refresh.access_token),
-            "refresh": str(refresh),
-        }
+        return issue_tokens(user)
     return 401, {"error": "Invalid username or password"}
 
 
@@ -52,12 +87,62 @@ def login(request, data: AuthSchema):
 def refresh_token(request, data: RefreshTokenSchema):
     """
     Refresh access token using refresh token
+
+    With ``ROTATE_REFRESH_TOKENS`` a new refresh token is issued and, with
+    ``BLACKLIST_AFTER_ROTATION``, the one used is revoked.
     """
     try:
         refresh = RefreshToken(data.refresh)
-        return {
-            "access": str(refresh.access_token),
-            "refresh": str(refresh),
-        }
+        if is_revoked(refresh):
+            return 401, {"error": "Invalid or expired refresh token"}
+        user = get_user_model().objects.get(
+            **{jwt_settings.USER_ID_FIELD: refresh[jwt_settings.USER_ID_CLAIM]})
+
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            # A revogação falha se outra requisição já usou o mesmo token
+            if jwt_settings.BLACKLIST_AFTER_ROTATION and not revoke_token(refresh):
+                return 401, {"error": "Invalid or expired refresh token"}
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+        # Reemitir as claims para refletir o estado atual do participante
+        return issue_tokens(user, refresh)
     except Exception as e:
         return 401, {"error": "Invalid or expired refresh token"}
+
+
+@router.post(
+    "/cohort/{exam_id}",
+    response={200: list[CohortTokenSchema], 400: dict, 403: dict, 404: dict},
+    auth=AuthBearer(),
+)
+def issue_exam_cohort_tokens(request, exam_id: int):
+    """
+    Pre-issue exam-scoped tokens for every participant enrolled in an exam.
+
+    Admins only. The tokens are handed out before the exam starts, so the
+    cohort does not need to log in during the peak. Large cohorts are signed
+    on a pool of ``COHORT_TOKEN_WORKERS`` processes.
+    """
+    if request.user.role != User.RoleTypes.ADMIN:
+        return 403, {"error": "Only admins can issue cohort tokens."}
+
+    exam = get_object_or_404(Exam, id=exam_id)
+    try:
+        return issue_cohort_tokens(exam, workers=settings.COHORT_TOKEN_WORKERS)
+    except ValueError as e:
+        return 400, {"error": str(e)}
+
+
+@router.get("/token-cache", response={200: dict, 403: dict}, auth=AuthBearer())
+def get_token_cache_stats(request):
+    """
+    Report the hits, misses and size of the validated token cache.
+
+    Admins only. The cache lives in each worker process, so the figures are
+    those of the process that served the request.
+    """
+    if request.user.role != User.RoleTypes.ADMIN:
+        return 403, {"error": "Only admins can read the token cache statistics."}
+    return AuthBearer.token_cache.stats()
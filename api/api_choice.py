@@ -3,45 +3,45 @@ from ninja import NinjaAPI, Query
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
 from .models import Choice, Question
-from .schemas import ChoiceSchema, CreateChoiceSchema, UpdateChoiceSchema
-from django.core.paginator import Paginator, EmptyPage
-from typing import Optional
+from .pagination import paginate
+from .search import search_ordering, search_queryset
+from .schemas import ChoiceSchema, CreateChoiceSchema, PageSchema, UpdateChoiceSchema
+from typing import Optional, Union
 import logging
 
 router = NinjaAPI(urls_namespace="choices")
 logger = logging.getLogger(__name__)
 
 
-@router.get("/", response={200: list[ChoiceSchema], 400: dict, 500: dict})
+@router.get("/", response={200: Union[list[ChoiceSchema], PageSchema[ChoiceSchema]], 400: dict, 500: dict})
 def list_choices(
     request,
     search: Optional[str] = Query(None),
     order: Optional[str] = Query(None),
     page: int = Query(1),
     page_size: int = Query(10),
+    cursor: Optional[str] = Query(None),
+    count: Optional[str] = Query(None),
 ):
-    """List all choices with optional search, sorting, and pagination."""
+    """List all choices with optional search, sorting, and page or cursor pagination."""
     try:
         choices = Choice.objects.all()
 
         if search:
-            choices = choices.filter(text__icontains=search)
+            choices = search_queryset(choices, search)
         # Ordenação
         valid_order_fields = ["text", "question_id", "-text", "-question_id"]
-        if order:
-            if order in valid_order_fields:
-                choices = choices.order_by(order)
-            else:
-                return 400, {"error": f"Invalid order field. Allowed: {', '.join(valid_order_fields)}"}
+        if order and order not in valid_order_fields:
+            return 400, {"error": f"Invalid order field. Allowed: {', '.join(valid_order_fields)}"}
 
         # Paginação
-        paginator = Paginator(choices, page_size)
         try:
-            paginated_choices = paginator.page(page)
-        except EmptyPage:
-            return 400, {"error": "Page number out of range."}
+            choices_page = paginate(
+                choices, search_ordering(order, search), page, page_size, cursor, count)
+        except ValueError as e:
+            return 400, {"error": str(e)}
 
-        return [ChoiceSchema.from_orm(c) for c in paginated_choices]
+        return choices_page.response([ChoiceSchema.from_orm(c) for c in choices_page.rows])
     except Exception as e:
         logger.error(f"Error while listing choices: {e}")
         return 500, {"error": "An error occurred while listing choices."}
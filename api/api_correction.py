@@ -1,19 +1,35 @@
-from ninja import NinjaAPI
+from ninja import NinjaAPI, Query
+from ninja.decorators import decorate_view
 from django.http import JsonResponse
-from api.services import calculate_exam_result
+from api.idempotency import idempotent
+from api.jobs import enqueue_correction_job
+from api.models import CorrectionJob
+from api.schemas import CorrectionJobSchema
+from api.services import calculate_exam_result, calculate_exam_results, get_exam_result
 import logging
 
 router = NinjaAPI(urls_namespace="corrections")
 logger = logging.getLogger(__name__)
 
 
-@router.post("/{participant_id}/exam/{exam_id}/", response={200: dict, 404: dict, 500: dict})
-def trigger_correction(request, participant_id: int, exam_id: int):
+@router.post("/{participant_id}/exam/{exam_id}/", response={200: dict, 400: dict, 404: dict, 500: dict})
+@decorate_view(idempotent)
+def trigger_correction(request, participant_id: int, exam_id: int, mode: str = Query("full")):
     """
     Trigger automatic correction for a participant's exam.
+
+    The ``incremental`` mode reads the result kept up to date by answer writes
+    instead of rescanning every answer.
     """
+    modes = {
+        "full": calculate_exam_result,
+        "incremental": get_exam_result,
+    }
+    if mode not in modes:
+        return JsonResponse({"error": f"Invalid mode. Allowed: {', '.join(modes.keys())}"}, status=400)
+
     try:
-        result = calculate_exam_result(participant_id, exam_id)
+        result = modes[mode](participant_id, exam_id)
         return JsonResponse(result, status=200)
     except ValueError as e:
         logger.error(f"Validation error: {e}")
@@ -21,3 +37,48 @@ def trigger_correction(request, participant_id: int, exam_id: int):
     except Exception as e:
         logger.error(f"Error while correcting exam: {e}")
         return JsonResponse({"error": "An internal error occurred."}, status=500)
+
+
+@router.post("/exam/{exam_id}/", response={200: dict, 404: dict, 500: dict})
+@decorate_view(idempotent)
+def trigger_exam_correction(request, exam_id: int):
+    """
+    Trigger automatic correction for every participant of an exam.
+    """
+    try:
+        result = calculate_exam_results(exam_id)
+        return JsonResponse(result, status=200)
+    except ValueError as e:
+        logger.error(f"Validation error: {e}")
+        return JsonResponse({"error": str(e)}, status=404)
+    except Exception as e:
+        logger.error(f"Error while correcting exam {exam_id}: {e}")
+        return JsonResponse({"error": "An internal error occurred."}, status=500)
+
+
+@router.post("/exam/{exam_id}/jobs/", response={202: CorrectionJobSchema, 404: dict, 500: dict})
+@decorate_view(idempotent)
+def enqueue_exam_correction(request, exam_id: int):
+    """
+    Enqueue a background correction of every participant of an exam.
+    """
+    try:
+        job = enqueue_correction_job(exam_id)
+        return 202, job
+    except ValueError as e:
+        logger.error(f"Validation error: {e}")
+        return 404, {"error": str(e)}
+    except Exception as e:
+        logger.error(f"Error while enqueuing correction for exam {exam_id}: {e}")
+        return 500, {"error": "An internal error occurred."}
+
+
+@router.get("/jobs/{job_id}/", response={200: CorrectionJobSchema, 404: dict})
+def get_correction_job(request, job_id: int):
+    """
+    Retrieve the status and progress of a correction job.
+    """
+    try:
+        return CorrectionJob.objects.get(id=job_id)
+    except CorrectionJob.DoesNotExist:
+        return 404, {"error": "Correction job not found."}
@@ -2,13 +2,15 @@ import logging
 from django.db import IntegrityError
 from django.http import Http404
 from ninja import NinjaAPI, Query
-from django.core.paginator import Paginator, EmptyPage
 from django.shortcuts import get_object_or_404
-from typing import Optional
+from typing import Optional, Union
 
 from api.api_auth import AuthBearer
-from .models import Exam, Participant
-from .schemas import ExamSchema, CreateExamSchema, UpdateExamSchema
+from api.enrollment import get_request_exam_ids, get_request_participant_id_or_404
+from .models import Exam
+from .pagination import paginate
+from .search import search_ordering, search_queryset
+from .schemas import ExamSchema, CreateExamSchema, PageSchema, UpdateExamSchema
 from typing import List
 
 
@@ -22,41 +24,40 @@ def list_participant_exams(request):
     List all exams the authenticated participant is enrolled in.
     """
     logger.debug(f"Authenticated user: {request.user}")
-    participant = get_object_or_404(Participant, user=request.user)
-    exams = Exam.objects.filter(participants=participant)
+    get_request_participant_id_or_404(request)
+    exams = Exam.objects.filter(id__in=get_request_exam_ids(request))
     logger.debug(f"Exams retrieved: {exams}")
     return exams
 
 
-@router.get("/", response={200: list[ExamSchema], 500: dict})
+@router.get("/", response={200: Union[list[ExamSchema], PageSchema[ExamSchema]], 400: dict, 500: dict})
 def list_exams(
     request,
     search: Optional[str] = Query(None),
     order: Optional[str] = Query(None),
     page: int = Query(1),
     page_size: int = Query(10),
+    cursor: Optional[str] = Query(None),
+    count: Optional[str] = Query(None),
 ):
-    """List all exams with search, sorting, and pagination."""
+    """List all exams with search, sorting, and page or cursor pagination."""
     try:
         exams = Exam.objects.all()
 
         if search:
-            exams = exams.filter(name__icontains=search)
+            exams = search_queryset(exams, search)
 
-        if order:
-            valid_order_fields = ["name", "-name", "start_date", "-start_date"]
-            if order in valid_order_fields:
-                exams = exams.order_by(order)
-            else:
-                return 400, {"error": f"Invalid order field. Allowed: {', '.join(valid_order_fields)}"}
+        valid_order_fields = ["name", "-name", "start_date", "-start_date"]
+        if order and order not in valid_order_fields:
+            return 400, {"error": f"Invalid order field. Allowed: {', '.join(valid_order_fields)}"}
 
-        paginator = Paginator(exams, page_size)
         try:
-            paginated_exams = paginator.page(page)
-        except EmptyPage:
-            return 400, {"error": "Page number out of range."}
+            exams_page = paginate(
+                exams, search_ordering(order, search), page, page_size, cursor, count)
+        except ValueError as e:
+            return 400, {"error": str(e)}
 
-        return [ExamSchema.from_orm(exam) for exam in paginated_exams]
+        return exams_page.response([ExamSchema.from_orm(exam) for exam in exams_page.rows])
     except Exception as e:
         return 500, {"error": f"An error occurred while listing exams: {e}"}
 
@@ -88,8 +89,14 @@ def update_exam(request, exam_id: int, data: UpdateExamSchema):
     """Update an existing exam."""
     try:
         exam = get_object_or_404(Exam, id=exam_id)
-        for attr, value in data.model_dump(exclude_unset=True).items():
+        changes = data.model_dump(exclude_unset=True)
+        for attr, value in changes.items():
             setattr(exam, attr, value)
+
+        # Uma prova reaberta deve ser corrigida de novo pelo agendador
+        if "end_date" in changes:
+            exam.graded_at = None
+
         exam.save()
         return exam
     except Http404:
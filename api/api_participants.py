@@ -3,26 +3,28 @@ from ninja import NinjaAPI, Query
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
 from .models import Participant, User, Exam
-from .schemas import ExamSchema, ParticipantSchema, CreateParticipantSchema, UpdateParticipantSchema
-from django.core.paginator import Paginator, EmptyPage
-from typing import Optional
+from .schemas import ExamSchema, PageSchema, ParticipantSchema, CreateParticipantSchema, UpdateParticipantSchema
+from typing import Optional, Union
 import logging
 from ninja.decorators import decorate_view
-from django.views.decorators.cache import cache_page
+from api.cache import cache_versioned
+from api.pagination import paginate
 
 router = NinjaAPI(urls_namespace="participants")
 logger = logging.getLogger(__name__)
 
 
-@router.get("/", response={200: list[ParticipantSchema], 400: dict, 500: dict})
-@decorate_view(cache_page(60*15))
+@router.get("/", response={200: Union[list[ParticipantSchema], PageSchema[ParticipantSchema]], 400: dict, 500: dict})
+@decorate_view(cache_versioned(["participants", "users", "exams"]))
 def list_participants(
     request,
     search: Optional[str] = Query(None),
     page: int = Query(1),
     page_size: int = Query(10),
+    cursor: Optional[str] = Query(None),
+    count: Optional[str] = Query(None),
 ):
-    """List all participants with optional search and pagination."""
+    """List all participants with optional search and page or cursor pagination."""
     try:
         participants = Participant.objects.select_related(
             "user"
@@ -33,11 +35,11 @@ def list_participants(
                 user__username__icontains=search
             )
 
-        paginator = Paginator(participants, page_size)
         try:
-            paginated_participants = paginator.page(page)
-        except EmptyPage:
-            return 400, {"error": "Page number out of range."}
+            participants_page = paginate(
+                participants, ["id"], page, page_size, cursor, count)
+        except ValueError as e:
+            return 400, {"error": str(e)}
 
         serialized_participants = [
             ParticipantSchema(
@@ -48,10 +50,10 @@ def list_participants(
                 created_at=participant.created_at,
                 updated_at=participant.updated_at,
             )
-            for participant in paginated_participants
+            for participant in participants_page.rows
         ]
 
-        return serialized_participants
+        return participants_page.response(serialized_participants)
     except Exception as e:
         logger.error(f"Error while listing participants: {e}")
         return 500, {"error": "An error occurred while listing participants."}
@@ -5,9 +5,10 @@ from ninja import NinjaAPI, Query
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
 from .models import Question, Exam
-from .schemas import QuestionSchema, CreateQuestionSchema, UpdateQuestionSchema
-from django.core.paginator import Paginator, EmptyPage
-from typing import Optional
+from .pagination import paginate
+from .search import search_ordering, search_queryset
+from .schemas import QuestionSchema, CreateQuestionSchema, PageSchema, UpdateQuestionSchema
+from typing import Optional, Union
 import logging
 
 router = NinjaAPI(urls_namespace="questions")
@@ -16,35 +17,34 @@ router = NinjaAPI(urls_namespace="questions")
 logger = logging.getLogger(__name__)
 
 
-@router.get("/", response={200: list[QuestionSchema], 400: dict, 500: dict})
+@router.get("/", response={200: Union[list[QuestionSchema], PageSchema[QuestionSchema]], 400: dict, 500: dict})
 def list_questions(
     request,
     search: Optional[str] = Query(None),
     order: Optional[str] = Query(None),
     page: int = Query(1),
     page_size: int = Query(10),
+    cursor: Optional[str] = Query(None),
+    count: Optional[str] = Query(None),
 ):
-    """List all questions with optional search, sorting, and pagination."""
+    """List all questions with optional search, sorting, and page or cursor pagination."""
     try:
         questions = Question.objects.all()
 
         if search:
-            questions = questions.filter(text__icontains=search)
+            questions = search_queryset(questions, search)
 
         valid_order_fields = ["text", "exam_id", "-text", "-exam_id"]
-        if order:
-            if order in valid_order_fields:
-                questions = questions.order_by(order)
-            else:
-                return 400, {"error": f"Invalid order field. Allowed: {', '.join(valid_order_fields)}"}
+        if order and order not in valid_order_fields:
+            return 400, {"error": f"Invalid order field. Allowed: {', '.join(valid_order_fields)}"}
 
-        paginator = Paginator(questions, page_size)
         try:
-            paginated_questions = paginator.page(page)
-        except EmptyPage:
-            return 400, {"error": "Page number out of range."}
+            questions_page = paginate(
+                questions, search_ordering(order, search), page, page_size, cursor, count)
+        except ValueError as e:
+            return 400, {"error": str(e)}
 
-        return [QuestionSchema.from_orm(q) for q in paginated_questions]
+        return questions_page.response([QuestionSchema.from_orm(q) for q in questions_page.rows])
     except Exception as e:
         logger.error(f"Error while listing questions: {e}")
         return 500, {"error": "An error occurred while listing questions."}
@@ -1,67 +1,222 @@
+import csv
+import json
+from itertools import chain
 from ninja import NinjaAPI, Query
+from django.http import Http404, StreamingHttpResponse
+from api.api_auth import AuthBearer
+from api.enrollment import get_request_participant_id_or_404
 from api.models import Result, Exam
-from django.db.models import F
-from django.core.paginator import Paginator, EmptyPage
-from typing import Optional
+from api.pagination import keyset_filter, paginate, reverse_ordering
+from api.ranking import exam_score_statistics, rank_results, ranking_namespace, seek_rank
+from django.db.models import Count, F, Q
+from typing import Optional, Union
 import logging
 from ninja.decorators import decorate_view
-from django.views.decorators.cache import cache_page
+from api.cache import cache_versioned
 
 router = NinjaAPI(urls_namespace="rankings")
 logger = logging.getLogger(__name__)
 
 
-@router.get("/{exam_id}/", response={200: list[dict], 400: dict, 404: dict, 500: dict})
-@decorate_view(cache_page(60*15))
+KEYSET_ORDERING = ["rank", "created_at", "id"]
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = ["rank", "username", "score", "max_score", "percentage"]
+MAX_NEIGHBOURS = 50
+
+
+class _Echo:
+    """Pseudo-buffer that hands each CSV line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _serialize_ranking(results):
+    return [
+        {
+            "rank": result["rank"],
+            "username": result["username"],
+            "score": result["score"],
+            "max_score": result["max_score"],
+            "percentage": round((result["score"] / result["max_score"]) * 100, 2),
+        }
+        for result in results
+    ]
+
+
+@router.get("/{exam_id}/", response={200: Union[list[dict], dict], 400: dict, 404: dict, 500: dict})
+@decorate_view(cache_versioned(lambda exam_id: [ranking_namespace(exam_id)]))
 def get_ranking(
     request,
     exam_id: int,
     order: Optional[str] = Query("rank"),
     page: int = Query(1),
     page_size: int = Query(10),
+    cursor: Optional[str] = Query(None),
+    count: Optional[str] = Query(None),
 ):
     """
     Get the ranking for an exam with optional ordering and pagination.
+
+    Passing ``cursor`` (empty for the first page) switches to keyset
+    pagination: the response becomes ``{"results": [...], "next_cursor": ...}``
+    and each page seeks straight to its first row. ``count`` (``exact`` or
+    ``estimated``) adds the total to that envelope.
     """
     try:
         exam = Exam.objects.get(id=exam_id)
 
         order_fields = {
-            "rank": "-score",
+            "rank": "rank",
             "username": "username",
-            "score": "-score",
+            "score": "rank",
         }
 
         if order not in order_fields:
             return 400, {"error": f"Invalid order field. Allowed: {', '.join(order_fields.keys())}"}
 
+        # O ranking é materializado em Result.rank, então cada página é uma leitura indexada
         results = (
             Result.objects.filter(exam=exam)
             .annotate(username=F("participant__user__username"))
-            .values("username", "score", "max_score", "created_at")
-            .order_by(order_fields[order], "created_at")
+            .values("id", "rank", "username", "score", "max_score", "created_at")
         )
 
-        paginator = Paginator(results, page_size)
+        if cursor is not None and order_fields[order] != "rank":
+            return 400, {"error": "Cursor pagination is only available for rank or score ordering."}
+
+        ordering = KEYSET_ORDERING if cursor is not None else [
+            order_fields[order], "created_at", "id"]
+        seek = seek_rank if order_fields[order] == "rank" else None
         try:
-            paginated_results = paginator.page(page)
-        except EmptyPage:
-            return 400, {"error": "Page number out of range."}
-
-        ranking = []
-        for rank, result in enumerate(paginated_results, start=(page - 1) * page_size + 1):
-            ranking.append({
-                "rank": rank,
-                "username": result["username"],
-                "score": result["score"],
-                "max_score": result["max_score"],
-                "percentage": round((result["score"] / result["max_score"]) * 100, 2),
-            })
-
-        return ranking
+            ranking_page = paginate(
+                results, ordering, page, page_size, cursor, count, seek=seek)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+        return ranking_page.response(
+            _serialize_ranking(rank_results(exam_id, ranking_page.rows)))
     except Exam.DoesNotExist:
         return 404, {"error": "Exam not found."}
     except Exception as e:
         logger.error(f"Error while calculating ranking for exam {
                      exam_id}: {e}")
         return 500, {"error": "An error occurred while calculating the ranking."}
+
+
+@router.get("/{exam_id}/me/", response={200: dict, 404: dict, 500: dict}, auth=AuthBearer())
+def get_my_rank(request, exam_id: int, neighbours: int = Query(2, ge=0, le=MAX_NEIGHBOURS)):
+    """
+    Get the authenticated participant's rank, percentile and neighbours in an exam.
+    """
+    try:
+        participant_id = get_request_participant_id_or_404(request)
+
+        results = (
+            Result.objects.filter(exam_id=exam_id)
+            .annotate(username=F("participant__user__username"))
+            .values("id", "rank", "username", "score", "max_score", "created_at")
+        )
+        mine = results.filter(participant_id=participant_id).first()
+        if mine is None:
+            return 404, {"error": "Result not found."}
+        rank_results(exam_id, [mine])
+
+        # Só o percentil precisa do total; a posição já está materializada
+        counts = Result.objects.filter(exam_id=exam_id).aggregate(
+            total=Count("id"),
+            lower=Count("id", filter=Q(score__lt=mine["score"])),
+        )
+        others = counts["total"] - 1
+        percentile = round(counts["lower"] / others * 100, 2) if others else 100.0
+
+        # Vizinhos imediatos na ordem do ranking, buscados pelo índice
+        key = [mine[field.lstrip("-")] for field in KEYSET_ORDERING]
+        reverse = reverse_ordering(KEYSET_ORDERING)
+        above = list(
+            results.filter(keyset_filter(reverse, key))
+            .order_by(*reverse)[:neighbours]
+        )[::-1]
+        below = list(
+            results.filter(keyset_filter(KEYSET_ORDERING, key))
+            .order_by(*KEYSET_ORDERING)[:neighbours]
+        )
+        rank_results(exam_id, above + below)
+
+        return {
+            **_serialize_ranking([mine])[0],
+            "percentile": percentile,
+            "total": counts["total"],
+            "above": _serialize_ranking(above),
+            "below": _serialize_ranking(below),
+        }
+    except Http404:
+        return 404, {"error": "Participant not found."}
+    except Exception as e:
+        logger.error(f"Error while calculating rank for exam {exam_id}: {e}")
+        return 500, {"error": "An error occurred while calculating the rank."}
+
+
+@router.get("/{exam_id}/export", response={200: None, 400: dict, 404: dict})
+def export_ranking(request, exam_id: int, format: str = Query("csv")):
+    """
+    Stream the full ranking of an exam as CSV or NDJSON.
+
+    Rows are read through ``QuerySet.iterator`` (a server-side cursor on
+    PostgreSQL) and written as they arrive, so memory stays constant
+    whatever the size of the exam.
+    """
+    if format not in ("csv", "ndjson"):
+        return 400, {"error": "Invalid format. Allowed: csv, ndjson"}
+    if not Exam.objects.filter(id=exam_id).exists():
+        return 404, {"error": "Exam not found."}
+
+    rows = (
+        Result.objects.filter(exam_id=exam_id)
+        .order_by(*KEYSET_ORDERING)
+        .values_list("rank", "participant__user__username", "score", "max_score")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+    def records():
+        for rank, username, score, max_score in rows:
+            percentage = round(score / max_score * 100, 2) if max_score else 0.0
+            yield [rank, username, score, max_score, percentage]
+
+    if format == "csv":
+        writer = csv.writer(_Echo())
+        content = (
+            writer.writerow(record)
+            for record in chain([EXPORT_FIELDS], records())
+        )
+        content_type = "text/csv"
+    else:
+        content = (
+            json.dumps(dict(zip(EXPORT_FIELDS, record))) + "\n"
+            for record in records()
+        )
+        content_type = "application/x-ndjson"
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = (
+        f'attachment; filename="ranking-exam-{exam_id}.{format}"')
+    return response
+
+
+@router.get("/{exam_id}/stats/", response={200: dict, 400: dict, 404: dict, 500: dict})
+@decorate_view(cache_versioned(lambda exam_id: [ranking_namespace(exam_id)]))
+def get_ranking_stats(request, exam_id: int, buckets: int = Query(10)):
+    """
+    Get the score distribution of an exam: mean, median, standard deviation,
+    percentiles and a histogram by percentage of the maximum score.
+    """
+    if not 1 <= buckets <= 100:
+        return 400, {"error": "Buckets must be between 1 and 100."}
+
+    try:
+        if not Exam.objects.filter(id=exam_id).exists():
+            return 404, {"error": "Exam not found."}
+        return exam_score_statistics(exam_id, buckets)
+    except Exception as e:
+        logger.error(f"Error while calculating statistics for exam {exam_id}: {e}")
+        return 500, {"error": "An error occurred while calculating the statistics."}
@@ -0,0 +1,99 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from ninja import NinjaAPI, Query
+from typing import Optional, Union
+import logging
+
+from .leaderboard import rank_standings
+from .models import Exam, ExamSeries, SeriesStanding
+from .pagination import paginate
+from .schemas import ExamSeriesSchema, CreateExamSeriesSchema
+
+router = NinjaAPI(urls_namespace="series")
+logger = logging.getLogger(__name__)
+
+KEYSET_ORDERING = ["-total_score", "created_at", "id"]
+
+
+def _serialize_series(series):
+    return ExamSeriesSchema(
+        id=series.id,
+        name=series.name,
+        exam_ids=list(series.exams.values_list("id", flat=True)),
+        created_at=series.created_at,
+        updated_at=series.updated_at,
+    )
+
+
+def _serialize_standings(series_id, rows):
+    return [
+        {
+            "rank": row["rank"],
+            "username": row["username"],
+            "total_score": row["total_score"],
+            "max_score": row["max_score"],
+            "percentage": round(row["total_score"] / row["max_score"] * 100, 2) if row["max_score"] else 0.0,
+        }
+        for row in rank_standings(series_id, rows)
+    ]
+
+
+@router.post("/", response={201: ExamSeriesSchema, 400: dict, 500: dict})
+def create_series(request, data: CreateExamSeriesSchema):
+    """Create an exam series with a combined leaderboard."""
+    try:
+        with transaction.atomic():
+            series = ExamSeries.objects.create(name=data.name)
+            series.exams.set(Exam.objects.filter(id__in=data.exam_ids))
+        return 201, _serialize_series(series)
+    except IntegrityError as e:
+        logger.error(f"Integrity error while creating series: {e}")
+        return 400, {"error": "A series with this name already exists."}
+    except Exception as e:
+        logger.error(f"Error while creating series: {e}")
+        return 500, {"error": "An error occurred while creating the series."}
+
+
+@router.get("/{series_id}/", response={200: ExamSeriesSchema, 404: dict})
+def get_series(request, series_id: int):
+    """Retrieve an exam series by ID."""
+    try:
+        return _serialize_series(ExamSeries.objects.get(id=series_id))
+    except ExamSeries.DoesNotExist:
+        return 404, {"error": "Series not found."}
+
+
+@router.get("/{series_id}/ranking/", response={200: Union[list[dict], dict], 400: dict, 404: dict, 500: dict})
+def get_series_ranking(
+    request,
+    series_id: int,
+    page: int = Query(1),
+    page_size: int = Query(10),
+    cursor: Optional[str] = Query(None),
+    count: Optional[str] = Query(None),
+):
+    """
+    Get the combined leaderboard of a series, with the same page-number and
+    cursor pagination as the exam ranking.
+    """
+    try:
+        if not ExamSeries.objects.filter(id=series_id).exists():
+            return 404, {"error": "Series not found."}
+
+        standings = (
+            SeriesStanding.objects.filter(series_id=series_id)
+            .annotate(username=F("participant__user__username"))
+            .values("id", "username", "total_score", "max_score", "created_at")
+        )
+
+        try:
+            standings_page = paginate(
+                standings, KEYSET_ORDERING, page, page_size, cursor, count)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+        return standings_page.response(
+            _serialize_standings(series_id, standings_page.rows))
+    except Exception as e:
+        logger.error(f"Error while calculating ranking for series {series_id}: {e}")
+        return 500, {"error": "An error occurred while calculating the ranking."}
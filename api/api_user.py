@@ -3,52 +3,52 @@ from ninja import NinjaAPI
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
 from .models import User
-from .schemas import UserSchema, CreateUserSchema, UpdateUserSchema
+from .schemas import PageSchema, UserSchema, CreateUserSchema, UpdateUserSchema
 from datetime import datetime
 import logging
 from ninja import Query
-from django.core.paginator import Paginator, EmptyPage
-from typing import Optional
+from typing import Optional, Union
 from ninja.decorators import decorate_view
-from django.views.decorators.cache import cache_page
+from api.cache import cache_versioned
+from api.pagination import paginate
+from api.search import search_ordering, search_queryset
 
 router = NinjaAPI(urls_namespace="users")
 logger = logging.getLogger(__name__)
 
 
-@router.get("/", response={200: list[UserSchema], 500: dict})
-@decorate_view(cache_page(60*15))
+@router.get("/", response={200: Union[list[UserSchema], PageSchema[UserSchema]], 400: dict, 500: dict})
+@decorate_view(cache_versioned(["users"]))
 def list_users(
     request,
     search: Optional[str] = Query(None),
     order: Optional[str] = Query(None),
     page: int = Query(1),
     page_size: int = Query(10),
+    cursor: Optional[str] = Query(None),
+    count: Optional[str] = Query(None),
 ):
     """
-    List all users with optional search, sorting, and pagination.
+    List all users with optional search, sorting, and page or cursor pagination.
     """
     try:
         users = User.objects.all()
 
         if search:
-            users = users.filter(username__icontains=search)
+            users = search_queryset(users, search)
 
-        if order:
-            valid_order_fields = ["username", "email",
-                                  "role", "-username", "-email", "-role"]
-            if order in valid_order_fields:
-                users = users.order_by(order)
-            else:
-                return 400, {"error": f"Invalid order field. Allowed: {', '.join(valid_order_fields)}"}
+        valid_order_fields = ["username", "email",
+                              "role", "-username", "-email", "-role"]
+        if order and order not in valid_order_fields:
+            return 400, {"error": f"Invalid order field. Allowed: {', '.join(valid_order_fields)}"}
 
-        paginator = Paginator(users, page_size)
         try:
-            paginated_users = paginator.page(page)
-        except EmptyPage:
-            return 400, {"error": "Page number out of range."}
+            users_page = paginate(
+                users, search_ordering(order, search), page, page_size, cursor, count)
+        except ValueError as e:
+            return 400, {"error": str(e)}
 
-        return [UserSchema.from_orm(user) for user in paginated_users]
+        return users_page.response([UserSchema.from_orm(user) for user in users_page.rows])
     except Exception as e:
         logger.error(f"Error while listing users: {e}")
         return 500, {"error": "An error occurred while listing users."}
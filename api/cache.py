@@ -0,0 +1,175 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+# Com um cache compartilhado as invalidações chegam a todos os processos e as
+# entradas podem viver por horas; com um cache local, só o TTL curto as limita
+VIEW_CACHE_TIMEOUT = 60 * 60 * 6
+LOCAL_VIEW_CACHE_TIMEOUT = 60 * 15
+
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_shared_cache() -> bool:
+    """
+    Tell whether the default cache is shared between processes.
+    """
+    return settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS
+
+
+def view_cache_timeout() -> int:
+    """
+    Return how long cached views are kept, shorter with a process-local cache.
+    """
+    return VIEW_CACHE_TIMEOUT if is_shared_cache() else LOCAL_VIEW_CACHE_TIMEOUT
+
+
+def _version_key(namespace: str) -> str:
+    return f"cache_version:{namespace}"
+
+
+def get_version(namespace: str) -> int:
+    """
+    Return the current cache version of a namespace.
+    """
+    return get_versions([namespace])[namespace]
+
+
+def get_versions(namespaces: list) -> dict:
+    """
+    Return the current cache versions of several namespaces in one cache call.
+    """
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(keys.keys())
+    versions = {keys[key]: version for key, version in found.items()}
+
+    for key, namespace in keys.items():
+        if namespace not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[namespace] = cache.get(key)
+    return versions
+
+
+def _incr_version(namespace: str) -> None:
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # A versão expirou ou nunca existiu: começar de um valor inédito
+        cache.set(_version_key(namespace), time.time_ns(), None)
+
+
+def bump_version(namespace: str) -> None:
+    """
+    Invalidate every cache entry built from a namespace by moving its version.
+
+    Inside a transaction the version moves at once, so the transaction reads
+    its own writes, and again after commit, so entries rebuilt meanwhile from
+    uncommitted data are dropped too.
+    """
+    _incr_version(namespace)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _incr_version(namespace), robust=True)
+
+
+def cache_versioned(namespaces, timeout: int = None):
+    """
+    Cache successful GET responses under the current versions of ``namespaces``.
+
+    ``namespaces`` is a list of names, or a callable receiving the view's path
+    arguments and returning one. Bumping any of the versions makes every
+    cached response built from it unreachable, so with a shared cache entries
+    can live for hours and still update as soon as the data changes.
+    ``timeout`` defaults to ``view_cache_timeout()``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            names = namespaces(**kwargs) if callable(namespaces) else namespaces
+            versions = get_versions(names)
+            path_hash = hashlib.md5(
+                request.get_full_path().encode()).hexdigest()
+            key = "view:" + ":".join(
+                f"{name}.{versions[name]}" for name in names) + f":{path_hash}"
+
+            response = cache.get(key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    cache.set(key, response, timeout or view_cache_timeout())
+            return response
+        return wrapper
+    return decorator
+
+
+class BoundedTTLCache:
+    """
+    Process-local mapping holding at most ``maxsize`` entries, each for ``ttl`` seconds.
+
+    The least recently used entry is evicted when the cache is full and
+    expired entries are dropped when read. Hits and misses are counted. Safe
+    to share between threads.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] <= time.monotonic():
+                del self._data[key]
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl: float = None) -> None:
+        """
+        Store ``value`` for ``ttl`` seconds, or for the cache's default TTL.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Return the hit and miss counters and the current number of entries.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,153 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import Http404
+
+from api.cache import bump_version, get_version, get_versions, is_shared_cache
+from api.models import Participant
+
+ENROLLMENT_TIMEOUT = 60 * 15
+
+
+def _cache_key(participant_id: int) -> str:
+    return f"enrollment:{participant_id}"
+
+
+def enrollment_version(participant_id: int) -> int:
+    """
+    Return the version of a participant's enrollment, moved on every change.
+
+    Tokens record it when issued, so their claims can be told apart from
+    stale ones without a query.
+    """
+    return get_version(_cache_key(participant_id))
+
+
+def enrollment_versions(participant_ids: list) -> dict:
+    """
+    Return the enrollment versions of several participants in one cache call.
+    """
+    versions = get_versions([_cache_key(participant_id) for participant_id in participant_ids])
+    return {
+        participant_id: versions[_cache_key(participant_id)]
+        for participant_id in participant_ids
+    }
+
+
+def get_enrolled_exam_ids(participant_id: int) -> frozenset:
+    """
+    Return the ids of the exams a participant is enrolled in.
+
+    With a cache shared between processes the set is cached for
+    ``ENROLLMENT_TIMEOUT`` seconds and dropped by the ``m2m_changed``
+    receivers whenever the participant's exams change. A process-local cache
+    would miss the changes made by other processes, so it is read from the
+    database every time instead.
+    """
+    key = _cache_key(participant_id)
+    shared = is_shared_cache()
+    exam_ids = cache.get(key) if shared else None
+    if exam_ids is None:
+        exam_ids = frozenset(
+            Participant.exams.through.objects.filter(
+                participant_id=participant_id
+            ).values_list("exam_id", flat=True)
+        )
+        if shared:
+            cache.set(key, exam_ids, ENROLLMENT_TIMEOUT)
+    return exam_ids
+
+
+def is_enrolled(participant_id: int, exam_id: int) -> bool:
+    """
+    Check whether a participant is enrolled in an exam.
+    """
+    return exam_id in get_enrolled_exam_ids(participant_id)
+
+
+def invalidate_enrollment(*participant_ids: int) -> None:
+    """
+    Drop the cached exam ids of the given participants.
+
+    Inside a transaction they are dropped again after commit, like
+    ``bump_version`` does, so sets cached meanwhile from uncommitted data go too.
+    """
+    keys = [_cache_key(participant_id) for participant_id in participant_ids]
+    cache.delete_many(keys)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: cache.delete_many(keys), robust=True)
+    for participant_id in participant_ids:
+        bump_version(_cache_key(participant_id))
+
+
+def _current_claims(request):
+    """
+    Return the request's access token if its enrollment claims are current.
+
+    The ``exam_ids`` claim is only trusted with a cache shared between
+    processes (``CACHE_BACKEND``), since a process-local cache never sees the
+    version moved by another process. A missing version key is recreated
+    with a new value, so it never matches.
+    """
+    token = getattr(request, "auth_token", None)
+    if token is None or token.get("participant_id") is None:
+        return None
+    if not is_shared_cache():
+        return None
+    if token.get("enrollment_version") != enrollment_version(token["participant_id"]):
+        return None
+    return token
+
+
+def get_request_participant_id(request):
+    """
+    Return the authenticated user's participant id, or ``None``.
+
+    Read from the ``participant_id`` claim of the access token with any
+    cache backend, since a user's participant id never changes; otherwise
+    looked up once. The result is kept on the request. A participant removed
+    after the token was issued has no enrollment left, and a write that
+    still reaches the database fails on its foreign key.
+    """
+    if not hasattr(request, "_participant_id"):
+        token = getattr(request, "auth_token", None)
+        if token is not None and token.get("participant_id") is not None:
+            request._participant_id = token["participant_id"]
+        else:
+            request._participant_id = (
+                Participant.objects.filter(user_id=request.user.id)
+                .values_list("id", flat=True)
+                .first()
+            )
+    return request._participant_id
+
+
+def get_request_participant_id_or_404(request) -> int:
+    """
+    Return the authenticated user's participant id, raising ``Http404`` if none.
+    """
+    participant_id = get_request_participant_id(request)
+    if participant_id is None:
+        raise Http404("No Participant matches the given query.")
+    return participant_id
+
+
+def get_request_exam_ids(request) -> frozenset:
+    """
+    Return the ids of the exams the authenticated participant is enrolled in.
+
+    Read from the ``exam_ids`` claim while it is current, otherwise from the
+    enrollment cache. Tokens scoped to one exam only ever grant that exam.
+    """
+    token = _current_claims(request)
+    if token is not None and "exam_ids" in token:
+        exam_ids = frozenset(token["exam_ids"])
+    else:
+        participant_id = get_request_participant_id(request)
+        if participant_id is None:
+            return frozenset()
+        exam_ids = get_enrolled_exam_ids(participant_id)
+
+    scope = getattr(request, "auth_token", {}).get("exam_scope")
+    if scope is not None:
+        exam_ids = exam_ids & {scope}
+    return exam_ids
@@ -0,0 +1,106 @@
+from itertools import chain
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, Q
+
+from api.answer_key import correct_choice_ids
+from api.models import Answer, Participant
+
+ANSWER_CHUNK_SIZE = 10000
+
+
+def grade_with_sql(exam_id: int, answer_key: dict, participant_ids=None) -> dict:
+    """
+    Score participants with one aggregate query over their answers.
+
+    Grades the given participants, or every participant enrolled in the exam
+    when ``participant_ids`` is ``None``. Returns ``{participant_id: score}``.
+    """
+    correct_ids = correct_choice_ids(answer_key)
+
+    if participant_ids is None:
+        participants = Participant.objects.filter(exams=exam_id)
+    else:
+        participants = Participant.objects.filter(id__in=participant_ids)
+
+    return dict(
+        participants.annotate(
+            score=Count(
+                "answers",
+                filter=Q(answers__choice_id__in=correct_ids),
+            )
+        ).values_list("id", "score")
+    )
+
+
+def grade_with_numpy(exam_id: int, answer_key: dict, participant_ids=None) -> dict:
+    """
+    Score participants by vectorizing their answers against the answer key.
+
+    Answers are loaded as a flat ``(participant_id, question_id, choice_id)``
+    array, matched against the correct choice ids with ``np.isin`` and
+    scored with ``np.bincount``, without building a model instance per
+    answer.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImproperlyConfigured(
+            "The 'numpy' grading backend requires numpy to be installed.")
+
+    answers = Answer.objects.filter(question__exam_id=exam_id)
+    if participant_ids is None:
+        participant_ids = list(
+            Participant.objects.filter(exams=exam_id).values_list("id", flat=True))
+        answers = answers.filter(participant__exams=exam_id)
+    else:
+        answers = answers.filter(participant_id__in=participant_ids)
+
+    scores = dict.fromkeys(participant_ids, 0)
+    if not answer_key:
+        return scores
+
+    rows = answers.values_list(
+        "participant_id", "question_id", "choice_id"
+    ).iterator(chunk_size=ANSWER_CHUNK_SIZE)
+    answer_rows = np.fromiter(
+        chain.from_iterable(rows), dtype=np.int64).reshape(-1, 3)
+    if not len(answer_rows):
+        return scores
+
+    # Cada alternativa pertence a uma única questão: basta saber se está no gabarito
+    correct_ids = np.fromiter(correct_choice_ids(answer_key), dtype=np.int64)
+    correct = np.isin(answer_rows[:, 2], correct_ids)
+
+    participants, inverse = np.unique(answer_rows[:, 0], return_inverse=True)
+    totals = np.bincount(inverse, weights=correct, minlength=len(participants))
+
+    scores.update(zip(participants.tolist(), totals.astype(np.int64).tolist()))
+    return scores
+
+
+GRADING_BACKENDS = {
+    "sql": grade_with_sql,
+    "numpy": grade_with_numpy,
+}
+
+
+def get_grading_backend():
+    """
+    Return the grading function selected by the ``EXAM_GRADING_BACKEND`` setting.
+    """
+    name = getattr(settings, "EXAM_GRADING_BACKEND", "sql")
+    try:
+        return GRADING_BACKENDS[name]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Invalid EXAM_GRADING_BACKEND '{name}'. "
+            f"Allowed: {', '.join(GRADING_BACKENDS.keys())}")
+
+
+def grade_participants(exam_id: int, answer_key: dict, participant_ids=None) -> dict:
+    """
+    Score participants of an exam with the configured grading backend.
+    """
+    return get_grading_backend()(exam_id, answer_key, participant_ids)
@@ -0,0 +1,89 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+IDEMPOTENCY_TTL = 60 * 60 * 24
+# Tempo máximo de uma requisição em andamento; o lock expira se o processo morrer
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+IDEMPOTENCY_WAIT_TIMEOUT = 30
+IDEMPOTENCY_POLL_INTERVAL = 0.05
+
+
+def _request_key(request, idempotency_key: str) -> str:
+    """
+    Scope an ``Idempotency-Key`` to the caller's credentials and the request path.
+    """
+    parts = [
+        request.method,
+        request.get_full_path(),
+        request.headers.get("Authorization", ""),
+        idempotency_key,
+    ]
+    return "idempotency:" + hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def _replay(entry) -> HttpResponse:
+    _, status, content, headers = entry
+    response = HttpResponse(content, status=status, headers=headers)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view):
+    """
+    Honour the ``Idempotency-Key`` header of POST requests.
+
+    The first request with a given key runs the view and its response is kept
+    in the Django cache, so a retry reaching any worker process gets the
+    stored response without running the view again. A ``cache.add`` lock
+    makes duplicates arriving while the first one is still running wait for
+    it; if it is still running after ``IDEMPOTENCY_WAIT_TIMEOUT`` seconds they
+    get 409. Reusing a key with a different body is rejected with 422. Server
+    errors are not stored, so a later retry runs again.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if request.method != "POST" or not idempotency_key:
+            return view(request, *args, **kwargs)
+
+        key = _request_key(request, idempotency_key)
+        lock_key = f"{key}:lock"
+        body_hash = hashlib.sha256(request.body).hexdigest()
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_TIMEOUT
+
+        while True:
+            entry = cache.get(key)
+            if entry is not None:
+                if entry[0] != body_hash:
+                    return JsonResponse(
+                        {"error": "Idempotency-Key was already used with a different request."},
+                        status=422,
+                    )
+                return _replay(entry)
+
+            if cache.add(lock_key, body_hash, IDEMPOTENCY_LOCK_TIMEOUT):
+                break
+            if time.monotonic() >= deadline:
+                return JsonResponse(
+                    {"error": "A request with this Idempotency-Key is still being processed."},
+                    status=409,
+                )
+            time.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+        try:
+            response = view(request, *args, **kwargs)
+            if response.status_code < 500:
+                cache.set(key, (
+                    body_hash,
+                    response.status_code,
+                    response.content,
+                    dict(response.headers),
+                ), IDEMPOTENCY_TTL)
+            return response
+        finally:
+            cache.delete(lock_key)
+    return wrapper
@@ -0,0 +1,187 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import django
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from api.answer_key import get_answer_key
+from api.grading import grade_participants
+from api.models import CorrectionJob, Exam, Participant
+from api.services import refresh_exam_rankings, save_exam_results
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = [
+    CorrectionJob.StatusTypes.PENDING,
+    CorrectionJob.StatusTypes.RUNNING,
+]
+
+# Um job em execução sem progresso registrado há mais tempo que isto é
+# considerado abandonado (worker encerrado) e volta para a fila
+JOB_LEASE_TIMEOUT = timedelta(minutes=10)
+
+
+def _lease_expired():
+    """
+    Filter matching running jobs whose worker stopped reporting progress.
+    """
+    return Q(
+        status=CorrectionJob.StatusTypes.RUNNING,
+        updated_at__lt=timezone.now() - JOB_LEASE_TIMEOUT,
+    )
+
+
+def enqueue_correction_job(exam_id: int) -> CorrectionJob:
+    """
+    Enqueue the correction of an exam, reusing a job that is still active.
+
+    A running job whose lease expired is put back in the queue instead. At
+    most one active job per exam is enforced by a unique constraint, so
+    concurrent calls all get the same job.
+    """
+    if not Exam.objects.filter(id=exam_id).exists():
+        raise ValueError("Exam not found.")
+
+    job = CorrectionJob.objects.filter(
+        exam_id=exam_id, status__in=ACTIVE_STATUSES).first()
+    if job is None:
+        try:
+            with transaction.atomic():
+                return CorrectionJob.objects.create(exam_id=exam_id)
+        except IntegrityError:
+            job = CorrectionJob.objects.get(
+                exam_id=exam_id, status__in=ACTIVE_STATUSES)
+
+    if CorrectionJob.objects.filter(_lease_expired(), pk=job.pk).update(
+        status=CorrectionJob.StatusTypes.PENDING,
+        processed=0,
+        updated_at=timezone.now(),
+    ):
+        job.refresh_from_db()
+    return job
+
+
+def claim_next_job():
+    """
+    Mark the oldest pending job as running and return it.
+
+    Running jobs whose lease expired are claimed again. Locked rows are
+    skipped, so several workers can poll the same table.
+    """
+    with transaction.atomic():
+        job = (
+            CorrectionJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=CorrectionJob.StatusTypes.PENDING) | _lease_expired())
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = CorrectionJob.StatusTypes.RUNNING
+        job.processed = 0
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "processed", "started_at", "updated_at"])
+    return job
+
+
+def _init_worker():
+    django.setup()
+
+
+def grade_chunk(exam_id: int, participant_ids: list) -> int:
+    """
+    Grade and save the results of a chunk of an exam's participants.
+    """
+    answer_key = get_answer_key(exam_id)
+    scores = grade_participants(exam_id, answer_key, participant_ids)
+    save_exam_results(
+        exam_id, scores, len(answer_key), refresh_ranking=False)
+    return len(participant_ids)
+
+
+def _claimed(job: CorrectionJob):
+    """
+    Filter matching the job only while it is still held by the claim of ``job``.
+
+    A worker whose lease expired may still be running after the job was
+    claimed again; its updates then match nothing.
+    """
+    return CorrectionJob.objects.filter(
+        pk=job.pk,
+        status=CorrectionJob.StatusTypes.RUNNING,
+        started_at=job.started_at,
+    )
+
+
+def run_correction_job(job: CorrectionJob, workers: int = 0, chunk_size: int = 1000):
+    """
+    Correct the job's exam in chunks of participants, recording the progress.
+
+    Chunks run on a pool of ``workers`` processes, or in the current process
+    when ``workers`` is 0. Progress and the final status are only written
+    while the job is still held by this claim; a worker that lost its lease
+    stops at the next chunk.
+    """
+    try:
+        participant_ids = list(
+            Participant.objects.filter(exams=job.exam_id)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        chunks = [
+            participant_ids[i:i + chunk_size]
+            for i in range(0, len(participant_ids), chunk_size)
+        ]
+        if not _claimed(job).update(total=len(participant_ids), updated_at=timezone.now()):
+            return _lease_lost(job)
+
+        if workers:
+            # As conexões não podem ser compartilhadas com os processos filhos
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = [
+                    pool.submit(grade_chunk, job.exam_id, chunk) for chunk in chunks
+                ]
+                for future in as_completed(futures):
+                    if not _record_progress(job, future.result()):
+                        for pending in futures:
+                            pending.cancel()
+                        return _lease_lost(job)
+        else:
+            for chunk in chunks:
+                if not _record_progress(job, grade_chunk(job.exam_id, chunk)):
+                    return _lease_lost(job)
+
+        refresh_exam_rankings(job.exam_id)
+        if not _claimed(job).update(
+            status=CorrectionJob.StatusTypes.DONE,
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        ):
+            return _lease_lost(job)
+    except Exception as e:
+        logger.error(f"Error while running correction job {job.id}: {e}")
+        _claimed(job).update(
+            status=CorrectionJob.StatusTypes.FAILED,
+            error=str(e),
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+
+    job.refresh_from_db()
+    return job
+
+
+def _record_progress(job: CorrectionJob, processed: int) -> bool:
+    return bool(_claimed(job).update(
+        processed=F("processed") + processed, updated_at=timezone.now()))
+
+
+def _lease_lost(job: CorrectionJob) -> CorrectionJob:
+    logger.warning(f"Correction job {job.id} was claimed by another worker; stopping.")
+    job.refresh_from_db()
+    return job
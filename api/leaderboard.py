@@ -0,0 +1,119 @@
+from collections import defaultdict
+
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from api.models import ExamSeries, Result, SeriesStanding
+
+
+def apply_series_delta(exam_id: int, participant_id: int, score_delta: float, max_score_delta: float) -> None:
+    """
+    Add a result's score change to the participant's totals in every series of the exam.
+
+    Standings are only created for positive changes; a negative change
+    comes from an existing result, so it only updates existing standings.
+    """
+    apply_series_deltas(exam_id, {participant_id: (score_delta, max_score_delta)})
+
+
+def apply_series_deltas(exam_id: int, deltas: dict) -> None:
+    """
+    Add the result changes of several participants to their series standings.
+
+    ``deltas`` maps each participant id to its ``(score_delta,
+    max_score_delta)``. Participants sharing the same change are updated
+    with a single query.
+    """
+    by_delta = defaultdict(list)
+    for participant_id, delta in deltas.items():
+        if any(delta):
+            by_delta[delta].append(participant_id)
+    if not by_delta:
+        return
+
+    series_ids = list(
+        ExamSeries.objects.filter(exams=exam_id).values_list("id", flat=True))
+    if not series_ids:
+        return
+
+    SeriesStanding.objects.bulk_create(
+        [
+            SeriesStanding(series_id=series_id, participant_id=participant_id)
+            for (score_delta, max_score_delta), participant_ids in by_delta.items()
+            if score_delta >= 0 and max_score_delta >= 0
+            for participant_id in participant_ids
+            for series_id in series_ids
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    for (score_delta, max_score_delta), participant_ids in by_delta.items():
+        SeriesStanding.objects.filter(
+            series_id__in=series_ids, participant_id__in=participant_ids
+        ).update(
+            total_score=F("total_score") + score_delta,
+            max_score=F("max_score") + max_score_delta,
+            updated_at=timezone.now(),
+        )
+
+
+def refresh_series_standings(series_id: int) -> None:
+    """
+    Rebuild every standing of a series from its results with one aggregate query.
+    """
+    totals = (
+        Result.objects.filter(exam__series=series_id)
+        .values("participant_id")
+        .annotate(total_score=Sum("score"), max_score=Sum("max_score"))
+        .values_list("participant_id", "total_score", "max_score")
+    )
+    standings = [
+        SeriesStanding(
+            series_id=series_id,
+            participant_id=participant_id,
+            total_score=total_score,
+            max_score=max_score,
+        )
+        for participant_id, total_score, max_score in totals
+    ]
+
+    SeriesStanding.objects.filter(series_id=series_id).exclude(
+        participant_id__in=Result.objects.filter(
+            exam__series=series_id).values("participant_id")
+    ).delete()
+    SeriesStanding.objects.bulk_create(
+        standings,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["series", "participant"],
+        update_fields=["total_score", "max_score", "updated_at"],
+    )
+
+
+def refresh_exam_series(exam_id: int) -> None:
+    """
+    Rebuild the standings of every series that contains an exam.
+    """
+    for series_id in ExamSeries.objects.filter(exams=exam_id).values_list("id", flat=True):
+        refresh_series_standings(series_id)
+
+
+def rank_standings(series_id: int, rows: list) -> list:
+    """
+    Attach the rank of each standing of a page, ties sharing the same rank.
+
+    A row's rank is one plus the number of standings with a strictly greater
+    total, counted for every distinct total of the page in a single query.
+    """
+    totals = sorted({row["total_score"] for row in rows})
+    if not totals:
+        return rows
+
+    counts = SeriesStanding.objects.filter(series_id=series_id).aggregate(**{
+        f"above_{i}": Count("id", filter=Q(total_score__gt=total))
+        for i, total in enumerate(totals)
+    })
+    ranks = {total: counts[f"above_{i}"] + 1 for i, total in enumerate(totals)}
+    for row in rows:
+        row["rank"] = ranks[row["total_score"]]
+    return rows
@@ -0,0 +1,135 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.answer_key import build_answer_key
+from api.grading import GRADING_BACKENDS
+from api.models import Answer, Choice, Exam, Participant, Question, User
+
+
+class _Rollback(Exception):
+    pass
+
+
+def grade_with_loop(exam_id: int, answer_key: dict, participant_ids=None) -> dict:
+    """
+    Reference grader reproducing the original per-answer loop.
+    """
+    exam = Exam.objects.get(id=exam_id)
+    questions = exam.questions.all()
+    scores = {}
+    for participant in Participant.objects.filter(exams=exam):
+        answers = Answer.objects.filter(
+            participant=participant, question__in=questions)
+        scores[participant.id] = sum(
+            1 for answer in answers if answer.choice.is_correct)
+    return scores
+
+
+class Command(BaseCommand):
+    help = "Compare the grading backends against the original per-answer loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "exam_id", type=int, nargs="?",
+            help="Exam to grade. Omit to benchmark a synthetic exam that is rolled back.")
+        parser.add_argument("--participants", type=int, default=1000)
+        parser.add_argument("--questions", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument(
+            "--skip-loop", action="store_true",
+            help="Do not run the original loop, which is slow on large exams.")
+
+    def handle(self, *args, **options):
+        if options["exam_id"] is not None:
+            if not Exam.objects.filter(id=options["exam_id"]).exists():
+                raise CommandError("Exam not found.")
+            self.run_benchmark(options["exam_id"], options)
+            return
+
+        try:
+            with transaction.atomic():
+                exam = self.create_synthetic_exam(
+                    options["participants"], options["questions"])
+                self.run_benchmark(exam.id, options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run_benchmark(self, exam_id: int, options):
+        answer_key = build_answer_key(exam_id)
+        graders = dict(GRADING_BACKENDS)
+        if not options["skip_loop"]:
+            graders["loop"] = grade_with_loop
+
+        reference = None
+        for name, grader in graders.items():
+            timings = []
+            try:
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    scores = grader(exam_id, answer_key)
+                    timings.append(time.perf_counter() - start)
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"{name:>6}: skipped ({e})"))
+                continue
+
+            if reference is None:
+                reference = scores
+            elif scores != reference:
+                raise CommandError(f"Backend '{name}' produced different scores.")
+
+            self.stdout.write(
+                f"{name:>6}: best {min(timings) * 1000:.1f} ms, "
+                f"mean {sum(timings) / len(timings) * 1000:.1f} ms "
+                f"({len(scores)} participants)"
+            )
+
+    def create_synthetic_exam(self, participants: int, questions: int) -> Exam:
+        self.stdout.write(
+            f"Creating synthetic exam with {participants} participants "
+            f"and {questions} questions..."
+        )
+        now = timezone.now()
+        exam = Exam.objects.create(
+            name=f"Grading benchmark {now.isoformat()}",
+            start_date=now,
+            end_date=now,
+        )
+        question_objs = Question.objects.bulk_create(
+            [Question(exam=exam, text=f"Question {i}") for i in range(questions)])
+        choice_objs = Choice.objects.bulk_create([
+            Choice(question=question, text=f"Choice {i}", is_correct=i == 0)
+            for question in question_objs
+            for i in range(4)
+        ])
+        choices_by_question = {}
+        for choice in choice_objs:
+            choices_by_question.setdefault(choice.question_id, []).append(choice)
+
+        users = User.objects.bulk_create([
+            User(username=f"benchmark_{now.timestamp()}_{i}", password="!")
+            for i in range(participants)
+        ])
+        participant_objs = Participant.objects.bulk_create(
+            [Participant(user=user) for user in users])
+        Participant.exams.through.objects.bulk_create([
+            Participant.exams.through(participant=participant, exam=exam)
+            for participant in participant_objs
+        ])
+        Answer.objects.bulk_create(
+            [
+                Answer(
+                    participant=participant,
+                    question=question,
+                    choice=random.choice(choices_by_question[question.id]),
+                )
+                for participant in participant_objs
+                for question in question_objs
+            ],
+            batch_size=5000,
+        )
+        return exam
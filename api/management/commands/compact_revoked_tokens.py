@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.revocation import compact_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = "Periodically delete revoked refresh tokens that have expired."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=60 * 60,
+            help="Seconds between compactions.")
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Compact once and exit.")
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = compact_revoked_tokens()
+            self.stdout.write(f"Removed {deleted} expired revoked tokens.")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services import calculate_exam_results
+
+
+class Command(BaseCommand):
+    help = "Correct an exam for every enrolled participant in a single pass."
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_id", type=int)
+
+    def handle(self, *args, **options):
+        try:
+            result = calculate_exam_results(options["exam_id"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Corrected {result['participants']} participants for exam "
+            f"'{result['exam']}' (max score {result['max_score']})."
+        ))
@@ -0,0 +1,42 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.jobs import claim_next_job, run_correction_job
+
+
+class Command(BaseCommand):
+    help = "Run queued correction jobs on a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(),
+            help="Number of grading processes. Use 0 to grade in this process.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--poll-interval", type=float, default=5.0,
+            help="Seconds to wait before polling again when the queue is empty.")
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Exit as soon as the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Running correction job {job.id} for exam {job.exam_id}...")
+            job = run_correction_job(
+                job, workers=options["workers"], chunk_size=options["chunk_size"])
+
+            if job.status == job.StatusTypes.DONE:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Job {job.id} corrected {job.processed} participants."))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f"Job {job.id} failed: {job.error}"))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.answer_buffer import flush_pending_answers
+
+
+class Command(BaseCommand):
+    help = "Apply answers queued in write-behind mode in batched upserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0,
+            help="Seconds to wait before polling again when the log is empty.")
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Exit as soon as the log is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = flush_pending_answers(batch_size=options["batch_size"])
+            if flushed:
+                self.stdout.write(f"Flushed {flushed} pending answers.")
+                continue
+            if options["once"]:
+                return
+            time.sleep(options["poll_interval"])
@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.scheduler import GradingScheduler
+
+
+class Command(BaseCommand):
+    help = "Grade every exam once, as soon as its end_date has passed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--refresh-interval", type=float, default=60.0,
+            help="Seconds between reloads of the pending exams from the database.")
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Grade the exams that are already closed and exit.")
+
+    def handle(self, *args, **options):
+        scheduler = GradingScheduler()
+        refresh_interval = timedelta(seconds=options["refresh_interval"])
+        next_refresh = timezone.now()
+
+        while True:
+            now = timezone.now()
+            if now >= next_refresh:
+                scheduler.refresh()
+                next_refresh = now + refresh_interval
+
+            for exam_id in scheduler.run_due(now):
+                self.stdout.write(self.style.SUCCESS(f"Graded exam {exam_id}."))
+
+            if options["once"]:
+                return
+
+            wake_up = next_refresh
+            next_deadline = scheduler.next_deadline()
+            if next_deadline is not None:
+                wake_up = min(wake_up, next_deadline)
+            time.sleep(max((wake_up - timezone.now()).total_seconds(), 0))
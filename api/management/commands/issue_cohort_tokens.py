@@ -0,0 +1,43 @@
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Exam
+from api.tokens import issue_cohort_tokens
+
+
+class Command(BaseCommand):
+    help = "Pre-issue exam-scoped access/refresh tokens for every participant of an exam."
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_id", type=int)
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(),
+            help="Number of signing processes. Use 0 to sign in this process.")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--output", help="CSV file to write the tokens to (default: stdout).")
+
+    def handle(self, *args, **options):
+        try:
+            exam = Exam.objects.get(id=options["exam_id"])
+            tokens = issue_cohort_tokens(
+                exam, workers=options["workers"], chunk_size=options["chunk_size"])
+        except Exam.DoesNotExist:
+            raise CommandError("Exam not found.")
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        fields = ["participant_id", "username", "access", "refresh"]
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                writer = csv.DictWriter(output, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(tokens)
+            self.stdout.write(self.style.SUCCESS(
+                f"Issued tokens for {len(tokens)} participants of exam '{exam.name}'."))
+        else:
+            writer = csv.DictWriter(self.stdout, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(tokens)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Exam
+from api.ranking import refresh_exam_ranking
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized ranks of one exam or of every exam."
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_ids", type=int, nargs="*")
+
+    def handle(self, *args, **options):
+        exam_ids = options["exam_ids"] or Exam.objects.values_list("id", flat=True)
+        for exam_id in exam_ids:
+            refresh_exam_ranking(exam_id)
+            self.stdout.write(f"Refreshed ranking of exam {exam_id}.")
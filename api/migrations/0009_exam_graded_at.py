@@ -0,0 +1,34 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:05
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def mark_closed_exams_as_graded(apps, schema_editor):
+    # Provas já encerradas não devem ser corrigidas de novo pelo agendador
+    Exam = apps.get_model("api", "Exam")
+    Exam.objects.filter(end_date__lte=timezone.now()).update(
+        graded_at=F("end_date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_correctionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='graded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='exam',
+            name='end_date',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.RunPython(
+            mark_closed_exams_as_graded, migrations.RunPython.noop),
+    ]
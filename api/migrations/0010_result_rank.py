@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:06
+
+from django.db import migrations, models
+
+
+def rank_existing_results(apps, schema_editor):
+    Result = apps.get_model("api", "Result")
+    quote_name = schema_editor.connection.ops.quote_name
+    table = quote_name(Result._meta.db_table)
+    sql = f"""
+        UPDATE {table} SET {quote_name("rank")} = ranked.new_rank
+        FROM (
+            SELECT id, RANK() OVER (PARTITION BY exam_id ORDER BY score DESC) AS new_rank
+            FROM {table}
+        ) AS ranked
+        WHERE {table}.id = ranked.id
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_exam_graded_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='result',
+            name='rank',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['exam', 'rank'], name='api_result_exam_id_f0bbc5_idx'),
+        ),
+        migrations.RunPython(rank_existing_results, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_result_rank'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['exam', '-score', 'created_at', 'id'], name='api_result_exam_id_f403bf_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_result_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exams', models.ManyToManyField(related_name='series', to='api.exam')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SeriesStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_score', models.FloatField(default=0.0)),
+                ('max_score', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='series_standings', to='api.participant')),
+                ('series', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='api.examseries')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['series', '-total_score', 'created_at', 'id'], name='api_seriess_series__b05d77_idx')],
+                'unique_together': {('series', 'participant')},
+            },
+        ),
+    ]
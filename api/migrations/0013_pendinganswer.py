@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_exam_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('choice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_answers', to='api.choice')),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_answers', to='api.participant')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_answers', to='api.question')),
+            ],
+        ),
+    ]
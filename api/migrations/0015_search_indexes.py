@@ -0,0 +1,78 @@
+# Generated by Django 5.1.3 on 2026-10-17 01:12
+
+from django.db import migrations
+
+# (modelo, campo) pesquisados em api.search.SEARCH_FIELDS
+SEARCH_FIELDS = [
+    ("Exam", "name"),
+    ("Question", "text"),
+    ("Choice", "text"),
+    ("User", "username"),
+]
+
+
+def _search_columns(apps):
+    for model_name, field_name in SEARCH_FIELDS:
+        model = apps.get_model("api", model_name)
+        yield model._meta.db_table, model._meta.get_field(field_name).column, model._meta.pk.column
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    quote_name = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == "postgresql":
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for table, column, _ in _search_columns(apps):
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {quote_name(f'{table}_{column}_trgm')} "
+                    f"ON {quote_name(table)} USING gin ({quote_name(column)} gin_trgm_ops)"
+                )
+        elif vendor == "sqlite":
+            for table, column, pk in _search_columns(apps):
+                qtable, column, pk = quote_name(table), quote_name(column), quote_name(pk)
+                fts = quote_name(f"{table}_fts")
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5({column}, content={qtable}, "
+                    f"content_rowid={pk}, tokenize='trigram')"
+                )
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES('rebuild')")
+                # Mantém o índice externo em dia com a tabela de conteúdo
+                cursor.execute(
+                    f"CREATE TRIGGER {quote_name(f'{table}_fts_ai')} AFTER INSERT ON {qtable} BEGIN "
+                    f"INSERT INTO {fts}(rowid, {column}) VALUES (new.{pk}, new.{column}); END"
+                )
+                cursor.execute(
+                    f"CREATE TRIGGER {quote_name(f'{table}_fts_ad')} AFTER DELETE ON {qtable} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.{pk}, old.{column}); END"
+                )
+                cursor.execute(
+                    f"CREATE TRIGGER {quote_name(f'{table}_fts_au')} AFTER UPDATE ON {qtable} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.{pk}, old.{column}); "
+                    f"INSERT INTO {fts}(rowid, {column}) VALUES (new.{pk}, new.{column}); END"
+                )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    quote_name = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == "postgresql":
+            for table, column, _ in _search_columns(apps):
+                cursor.execute(f"DROP INDEX IF EXISTS {quote_name(f'{table}_{column}_trgm')}")
+        elif vendor == "sqlite":
+            for table, _, _ in _search_columns(apps):
+                for suffix in ("ai", "ad", "au"):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {quote_name(f'{table}_fts_{suffix}')}")
+                cursor.execute(f"DROP TABLE IF EXISTS {quote_name(f'{table}_fts')}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-17 00:56
+
+from django.db import migrations, models
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    # Mantém só o job ativo mais antigo de cada prova antes de criar a restrição
+    CorrectionJob = apps.get_model("api", "CorrectionJob")
+    active = CorrectionJob.objects.filter(status__in=["pending", "running"]).order_by("created_at", "id")
+    kept = set()
+    for job_id, exam_id in active.values_list("id", "exam_id"):
+        if exam_id in kept:
+            CorrectionJob.objects.filter(id=job_id).update(
+                status="failed", error="Superseded by an older active job.")
+        kept.add(exam_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='correctionjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('exam',), name='unique_active_correction_job'),
+        ),
+    ]
@@ -13,6 +13,14 @@ class User(AbstractUser):
     creation_date = models.DateTimeField(auto_now_add=True)
     modification_date = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guardar o nome carregado para invalidar só os rankings que o exibem
+        if "username" in field_names:
+            instance._loaded_username = values[field_names.index("username")]
+        return instance
+
     def __str__(self):
         return f"User {self.username} with role {self.role}"
 
@@ -21,7 +29,8 @@ class Exam(models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(null=True, blank=True)
     start_date = models.DateTimeField()
-    end_date = models.DateTimeField()
+    end_date = models.DateTimeField(db_index=True)
+    graded_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -89,11 +98,125 @@ class Result(models.Model):
     )
     score = models.FloatField(default=0.0)
     max_score = models.FloatField(default=0.0)
+    rank = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("participant", "exam")
+        indexes = [
+            models.Index(fields=["exam", "rank"]),
+            models.Index(fields=["exam", "-score", "created_at", "id"]),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guardar as pontuações carregadas para manter as séries ao salvar
+        if "score" in field_names:
+            instance._loaded_score = values[field_names.index("score")]
+        if "max_score" in field_names:
+            instance._loaded_max_score = values[field_names.index("max_score")]
+        return instance
 
     def __str__(self):
         return f"Result for {self.participant.user.username} in {self.exam.name}"
+
+
+class CorrectionJob(models.Model):
+
+    class StatusTypes(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    exam = models.ForeignKey(
+        Exam, on_delete=models.CASCADE, related_name="correction_jobs"
+    )
+    status = models.CharField(
+        max_length=20, choices=StatusTypes.choices, default=StatusTypes.PENDING)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+        constraints = [
+            # No máximo um job pendente ou em execução por prova
+            models.UniqueConstraint(
+                fields=["exam"],
+                condition=models.Q(status__in=["pending", "running"]),
+                name="unique_active_correction_job",
+            ),
+        ]
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 100.0 if self.status == self.StatusTypes.DONE else 0.0
+        return round(self.processed / self.total * 100, 2)
+
+    def __str__(self):
+        return f"Correction job {self.id} for {self.exam.name} ({self.status})"
+
+
+class ExamSeries(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    exams = models.ManyToManyField(Exam, related_name="series")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class SeriesStanding(models.Model):
+    series = models.ForeignKey(
+        ExamSeries, on_delete=models.CASCADE, related_name="standings"
+    )
+    participant = models.ForeignKey(
+        Participant, on_delete=models.CASCADE, related_name="series_standings"
+    )
+    total_score = models.FloatField(default=0.0)
+    max_score = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("series", "participant")
+        indexes = [
+            models.Index(fields=["series", "-total_score", "created_at", "id"]),
+        ]
+
+    def __str__(self):
+        return f"Standing for {self.participant.user.username} in {self.series.name}"
+
+
+class PendingAnswer(models.Model):
+    participant = models.ForeignKey(
+        Participant, on_delete=models.CASCADE, related_name="pending_answers"
+    )
+    question = models.ForeignKey(
+        Question, on_delete=models.CASCADE, related_name="pending_answers"
+    )
+    choice = models.ForeignKey(
+        Choice, on_delete=models.CASCADE, related_name="pending_answers"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Participant {self.participant.user.username} queued '{self.choice.text}' for question '{self.question.text}'"
+
+
+class RevokedToken(models.Model):
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Revoked token {self.jti}"
@@ -0,0 +1,201 @@
+import logging
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import (
+    Aggregate, Avg, Count, F, FloatField, IntegerField, Max, Min, Q, StdDev, Value,
+)
+from django.db.models.functions import Cast, Floor, Least
+
+from api.cache import bump_version
+from api.models import Exam, Result
+
+logger = logging.getLogger(__name__)
+
+# Só as linhas cuja posição mudou são reescritas
+RANK_UPDATE_SQL = """
+    UPDATE {table} SET {rank} = ranked.new_rank
+    FROM (
+        SELECT id, RANK() OVER (ORDER BY score DESC) AS new_rank
+        FROM {table}
+        WHERE exam_id = %s
+    ) AS ranked
+    WHERE {table}.id = ranked.id
+    AND ({table}.{rank} IS NULL OR {table}.{rank} <> ranked.new_rank)
+"""
+
+
+def ranking_namespace(exam_id) -> str:
+    """
+    Cache namespace of everything derived from an exam's results.
+
+    Bumped by ``invalidate_ranking`` and ``refresh_exam_ranking``.
+    """
+    return f"ranking:{exam_id}"
+
+
+def refresh_exam_ranking(exam_id: int) -> None:
+    """
+    Recompute the materialized ranks of an exam with a single ``RANK()`` window query.
+
+    Ties share the same rank and the next rank skips accordingly (1, 2, 2, 4).
+    Refreshes of the same exam are serialized by locking the exam row, so
+    concurrent refreshes never update the same results in opposite orders.
+    """
+    sql = RANK_UPDATE_SQL.format(
+        table=connection.ops.quote_name(Result._meta.db_table),
+        rank=connection.ops.quote_name("rank"),
+    )
+    with transaction.atomic():
+        list(Exam.objects.select_for_update().filter(id=exam_id).values_list("id"))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [exam_id])
+    bump_version(ranking_namespace(exam_id))
+
+
+def _refresh_after_commit(exam_id: int) -> None:
+    try:
+        refresh_exam_ranking(exam_id)
+    except Exception as e:
+        # A transação que alterou o resultado já foi confirmada
+        logger.error(f"Error while refreshing the ranking of exam {exam_id}: {e}")
+
+
+def invalidate_ranking(exam_id: int) -> None:
+    """
+    Drop every cached ranking of an exam and recompute its ranks after commit.
+
+    The ranks are not touched inside the caller's transaction: a writer only
+    locks its own result, and the window ``UPDATE`` runs in its own short
+    transaction once the change is committed (right away in autocommit).
+    """
+    bump_version(ranking_namespace(exam_id))
+    transaction.on_commit(partial(_refresh_after_commit, exam_id))
+
+
+def rank_results(exam_id: int, rows: list) -> list:
+    """
+    Fill in the rank of the rows of a page that have not been ranked yet.
+
+    A result created since the last refresh has no rank until its
+    transaction's refresh runs. Its rank is one plus the number of results
+    of the exam with a strictly greater score, counted for every such
+    score in a single query; rows that already have a rank are left as is.
+    """
+    scores = sorted({row["score"] for row in rows if row["rank"] is None})
+    if not scores:
+        return rows
+
+    counts = Result.objects.filter(exam_id=exam_id).aggregate(**{
+        f"above_{i}": Count("id", filter=Q(score__gt=score))
+        for i, score in enumerate(scores)
+    })
+    ranks = {score: counts[f"above_{i}"] + 1 for i, score in enumerate(scores)}
+    for row in rows:
+        if row["rank"] is None:
+            row["rank"] = ranks[row["score"]]
+    return rows
+
+
+def seek_rank(queryset, offset: int):
+    """
+    Narrow a rank-ordered queryset to the rows starting near ``offset``.
+
+    The row at ``offset`` has the greatest rank not above ``offset + 1``, so
+    the page is read from that rank through the ``(exam, rank)`` index and
+    only the tied rows before it are skipped. Returns the narrowed queryset
+    and the offset left to skip in it.
+    """
+    if not offset:
+        return queryset, offset
+    first_rank = queryset.filter(rank__lte=offset + 1).aggregate(
+        first_rank=Max("rank"))["first_rank"]
+    if first_rank is None:
+        return queryset, offset
+    return queryset.filter(rank__gte=first_rank), offset - (first_rank - 1)
+
+
+PERCENTILES = [10, 25, 50, 75, 90, 99]
+
+
+class PercentileCont(Aggregate):
+    """
+    PostgreSQL ``percentile_cont`` ordered-set aggregate.
+    """
+    function = "PERCENTILE_CONT"
+    template = "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile: float, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+def _interpolated_percentile(values: list, percentile: float) -> float:
+    # Mesma interpolação linear do percentile_cont
+    position = (len(values) - 1) * percentile
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def exam_score_statistics(exam_id: int, buckets: int = 10) -> dict:
+    """
+    Compute the score distribution of an exam with database aggregates.
+
+    Percentiles use ``percentile_cont`` on PostgreSQL and a single pass over
+    the sorted scores elsewhere. The histogram groups the results by
+    percentage of the maximum score.
+    """
+    results = Result.objects.filter(exam_id=exam_id)
+
+    aggregates = {
+        "count": Count("id"),
+        "mean": Avg("score"),
+        "std_dev": StdDev("score"),
+        "min": Min("score"),
+        "max": Max("score"),
+    }
+    if connection.vendor == "postgresql":
+        aggregates.update({
+            f"p{percentile}": PercentileCont("score", percentile / 100)
+            for percentile in PERCENTILES
+        })
+    stats = results.aggregate(**aggregates)
+
+    if connection.vendor != "postgresql":
+        scores = list(results.order_by("score").values_list("score", flat=True))
+        for percentile in PERCENTILES:
+            stats[f"p{percentile}"] = (
+                _interpolated_percentile(scores, percentile / 100) if scores else None)
+
+    counts = dict(
+        results.filter(max_score__gt=0)
+        .annotate(bucket=Cast(
+            Least(Floor(F("score") * buckets / F("max_score")), Value(float(buckets - 1))),
+            IntegerField(),
+        ))
+        .values_list("bucket")
+        .annotate(total=Count("id"))
+        .values_list("bucket", "total")
+    )
+    width = 100 / buckets
+
+    return {
+        "count": stats["count"],
+        "mean": stats["mean"],
+        "median": stats["p50"],
+        "std_dev": stats["std_dev"],
+        "min": stats["min"],
+        "max": stats["max"],
+        "percentiles": {
+            str(percentile): stats[f"p{percentile}"] for percentile in PERCENTILES
+        },
+        "histogram": [
+            {
+                "from": round(bucket * width, 2),
+                "to": round((bucket + 1) * width, 2),
+                "count": counts.get(bucket, 0),
+            }
+            for bucket in range(buckets)
+        ],
+    }
@@ -0,0 +1,156 @@
+import hashlib
+import math
+import threading
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from api.cache import bump_version, get_versions
+from api.models import RevokedToken
+
+REVOCATION_BLOOM_CAPACITY = 100_000
+REVOCATION_BLOOM_ERROR_RATE = 0.001
+# Revogações gravadas em transações ainda abertas aparecem com atraso
+REVOCATION_SYNC_OVERLAP = timedelta(minutes=1)
+
+# Novas revogações movem a versão; a compactação move a geração
+_VERSION = "revoked_tokens"
+_GENERATION = "revoked_tokens.generation"
+
+
+class BloomFilter:
+    """
+    Set membership with no false negatives and a bounded false-positive rate.
+
+    Sized for ``capacity`` items at ``error_rate``. Items cannot be removed,
+    so the filter is rebuilt when its entries are compacted.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode()).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class _RevocationFilter:
+    """
+    Process-local Bloom filter over the ``jti`` of every revoked token.
+
+    Kept in step with the table through two cache versions: a new revocation
+    only loads the rows created since shortly before the last sync, while a
+    compaction rebuilds the filter from scratch.
+    """
+
+    def __init__(self):
+        self.bloom = None
+        self.versions = None
+        self.synced_at = None
+        self._lock = threading.Lock()
+
+    def sync(self) -> None:
+        versions = get_versions([_VERSION, _GENERATION])
+        with self._lock:
+            if versions == self.versions:
+                return
+            now = timezone.now()
+            if self.bloom is None or versions[_GENERATION] != self.versions[_GENERATION]:
+                self._rebuild(now)
+            else:
+                self._load(RevokedToken.objects.filter(
+                    created_at__gte=self.synced_at - REVOCATION_SYNC_OVERLAP))
+                if self.bloom.count > self.bloom.capacity:
+                    self._rebuild(now)
+            self.versions = versions
+            self.synced_at = now
+
+    def _rebuild(self, now) -> None:
+        rows = RevokedToken.objects.filter(expires_at__gt=now)
+        capacity = max(REVOCATION_BLOOM_CAPACITY, rows.count() * 2)
+        self.bloom = BloomFilter(capacity, REVOCATION_BLOOM_ERROR_RATE)
+        self._load(rows)
+
+    def _load(self, rows) -> None:
+        for jti in rows.values_list("jti", flat=True).iterator():
+            if jti not in self.bloom:
+                self.bloom.add(jti)
+
+    def __contains__(self, jti: str) -> bool:
+        self.sync()
+        return jti in self.bloom
+
+    def reset(self) -> None:
+        with self._lock:
+            self.bloom = None
+            self.versions = None
+            self.synced_at = None
+
+
+revoked_jtis = _RevocationFilter()
+
+
+def is_revoked(token) -> bool:
+    """
+    Check whether a token has been revoked.
+
+    The Bloom filter answers the common "not revoked" case without a query;
+    only its rare positives are confirmed in the database.
+    """
+    jti = token[jwt_settings.JTI_CLAIM]
+    if jti not in revoked_jtis:
+        return False
+    return RevokedToken.objects.filter(jti=jti).exists()
+
+
+def revoke_token(token) -> bool:
+    """
+    Revoke a token until it expires.
+
+    Returns ``False`` when the token was already revoked, so concurrent
+    attempts to use the same refresh token cannot both succeed.
+    """
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(
+                jti=token[jwt_settings.JTI_CLAIM],
+                expires_at=datetime_from_epoch(token["exp"]),
+            )
+    except IntegrityError:
+        return False
+    bump_version(_VERSION)
+    return True
+
+
+def compact_revoked_tokens() -> int:
+    """
+    Delete the revocations of tokens that have expired anyway.
+
+    Every process rebuilds its Bloom filter without them on the next check.
+    Returns the number of entries removed.
+    """
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    if deleted:
+        bump_version(_GENERATION)
+    return deleted
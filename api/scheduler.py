@@ -0,0 +1,97 @@
+import heapq
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import Exam
+from api.services import calculate_exam_results
+
+logger = logging.getLogger(__name__)
+
+
+class GradingScheduler:
+    """
+    Priority queue of exams waiting to be graded, ordered by ``end_date``.
+
+    Several scheduler instances may run at once: an exam is graded by the
+    instance holding its row lock, and ``graded_at`` is only set once grading
+    has succeeded.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._deadlines = {}
+
+    def refresh(self):
+        """
+        Load the exams that were not graded yet into the queue.
+        """
+        pending = dict(
+            Exam.objects.filter(graded_at__isnull=True)
+            .values_list("id", "end_date")
+        )
+        for exam_id, end_date in pending.items():
+            if self._deadlines.get(exam_id) != end_date:
+                self._deadlines[exam_id] = end_date
+                heapq.heappush(self._heap, (end_date, exam_id))
+
+        # Provas corrigidas ou removidas por outra instância saem da fila
+        for exam_id in set(self._deadlines) - set(pending):
+            del self._deadlines[exam_id]
+
+    def next_deadline(self):
+        """
+        Return the earliest pending ``end_date``, or ``None`` if the queue is empty.
+        """
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None) -> list:
+        """
+        Remove and return the ids of every exam whose window has closed.
+        """
+        now = now or timezone.now()
+        due = []
+        self._discard_stale()
+        while self._heap and self._heap[0][0] <= now:
+            end_date, exam_id = heapq.heappop(self._heap)
+            del self._deadlines[exam_id]
+            due.append(exam_id)
+            self._discard_stale()
+        return due
+
+    def run_due(self, now=None) -> list:
+        """
+        Grade every exam whose window has closed and that no other instance claimed.
+
+        Each exam is graded in one transaction that locks its row and sets
+        ``graded_at`` last, so a crash or failure leaves it pending.
+        """
+        now = now or timezone.now()
+        graded = []
+        for exam_id in self.pop_due(now):
+            try:
+                with transaction.atomic():
+                    # Linhas travadas estão sendo corrigidas por outra instância
+                    exam = (
+                        Exam.objects.select_for_update(skip_locked=True)
+                        .filter(id=exam_id, graded_at__isnull=True, end_date__lte=now)
+                        .first()
+                    )
+                    if exam is None:
+                        continue
+                    calculate_exam_results(exam_id)
+                    Exam.objects.filter(id=exam_id).update(graded_at=now)
+                graded.append(exam_id)
+            except Exception as e:
+                logger.error(f"Error while grading exam {exam_id}: {e}")
+        return graded
+
+    def _discard_stale(self):
+        # Entradas antigas de provas cujo end_date mudou ou que saíram da fila
+        while self._heap:
+            end_date, exam_id = self._heap[0]
+            if self._deadlines.get(exam_id) == end_date:
+                return
+            heapq.heappop(self._heap)
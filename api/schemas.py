@@ -1,11 +1,19 @@
 from pydantic import BaseModel, Field
 from ninja import Schema
 from pydantic import EmailStr, BaseModel, Field
-from typing import Optional
+from typing import Generic, Optional, TypeVar
 from datetime import datetime
 
 from api.models import User
 
+T = TypeVar("T")
+
+
+class PageSchema(BaseModel, Generic[T]):
+    results: list[T]
+    next_cursor: Optional[str] = None
+    count: Optional[int] = None
+
 
 class UserSchema(Schema):
     id: int
@@ -47,6 +55,7 @@ class ExamSchema(BaseModel):
     description: Optional[str]
     start_date: datetime
     end_date: datetime
+    graded_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
@@ -153,3 +162,59 @@ class CreateAnswerSchema(BaseModel):
 
 class UpdateAnswerSchema(BaseModel):
     choice_id: int
+
+
+class PendingAnswerSchema(BaseModel):
+    participant_id: int
+    question_id: int
+    choice_id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SheetAnswerSchema(BaseModel):
+    question_id: int
+    choice_id: int
+    updated_at: datetime
+    pending: bool
+
+
+class AnswerSheetItemSchema(BaseModel):
+    question_id: int
+    choice_id: int
+
+
+class AnswerSheetSchema(BaseModel):
+    exam_id: int
+    answers: list[AnswerSheetItemSchema]
+
+
+class CorrectionJobSchema(BaseModel):
+    id: int
+    exam_id: int
+    status: str
+    total: int
+    processed: int
+    progress: float
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class ExamSeriesSchema(BaseModel):
+    id: int
+    name: str
+    exam_ids: list[int]
+    created_at: datetime
+    updated_at: datetime
+
+
+class CreateExamSeriesSchema(BaseModel):
+    name: str = Field(..., max_length=255)
+    exam_ids: list[int]
@@ -0,0 +1,86 @@
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Func, Value
+from django.db.models.expressions import RawSQL
+
+from api.models import Choice, Exam, Question, User
+
+# Campo pesquisado por modelo; cada um tem um índice de busca na migração 0015
+SEARCH_FIELDS = {
+    Exam: "name",
+    Question: "text",
+    Choice: "text",
+    User: "username",
+}
+
+# O tokenizador trigram do FTS5 só encontra termos com pelo menos 3 caracteres
+MIN_FTS_TERM_LENGTH = 3
+
+
+def fts_table(model) -> str:
+    return f"{model._meta.db_table}_fts"
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_queryset(queryset, term: str):
+    """
+    Filter ``queryset`` to the rows whose search field contains ``term``.
+
+    Rows are annotated with ``search_rank`` (higher is better) and ordered
+    by it. On PostgreSQL the match uses the ``pg_trgm`` GIN index and the rank
+    is the trigram word similarity. On SQLite both come from the FTS5
+    trigram table kept in sync by triggers. Other databases, and terms too
+    short for trigrams, fall back to ``icontains`` with a constant rank.
+    """
+    model = queryset.model
+    field = SEARCH_FIELDS[model]
+    connection = connections[queryset.db]
+    column = connection.ops.quote_name(model._meta.get_field(field).column)
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+
+    if connection.vendor == "postgresql":
+        queryset = queryset.filter(
+            RawSQL(
+                f"{table}.{column} ILIKE %s",
+                [f"%{_escape_like(term)}%"],
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=Func(
+                Value(term), F(field), function="word_similarity", output_field=FloatField()
+            )
+        )
+    elif connection.vendor == "sqlite" and len(term) >= MIN_FTS_TERM_LENGTH:
+        fts = connection.ops.quote_name(fts_table(model))
+        match = '"' + term.replace('"', '""') + '"'
+        queryset = queryset.filter(
+            RawSQL(
+                f"{table}.{pk} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)",
+                [match],
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"(SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND rowid = {table}.{pk})",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+    else:
+        queryset = queryset.filter(**{f"{field}__icontains": term}).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    return queryset.order_by("-search_rank")
+
+
+def search_ordering(order: str | None, term: str | None) -> list[str]:
+    """Listing order: the requested field, else relevance when searching, else id."""
+    if order:
+        return [order, "id"]
+    if term:
+        return ["-search_rank", "id"]
+    return ["id"]
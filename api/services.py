@@ -1,4 +1,13 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.answer_key import correct_choice_ids, get_answer_key
+from api.grading import grade_participants
+from api.leaderboard import apply_series_delta, refresh_exam_series
 from api.models import Answer, Result, Choice, Participant, Exam
+from api.ranking import invalidate_ranking
 
 
 def calculate_exam_result(participant_id: int, exam_id: int):
@@ -6,20 +15,15 @@ def calculate_exam_result(participant_id: int, exam_id: int):
     Calculate the result of an exam for a specific participant.
     """
     try:
-        participant = Participant.objects.get(id=participant_id)
+        participant = Participant.objects.select_related(
+            "user").get(id=participant_id)
         exam = Exam.objects.get(id=exam_id)
 
-        questions = exam.questions.all()
-        answers = Answer.objects.filter(
-            participant=participant, question__in=questions)
-
-        score = 0
-        max_score = len(questions)
-
-        # Avaliar cada resposta
-        for answer in answers:
-            if answer.choice.is_correct:
-                score += 1
+        # Avaliar as respostas pelo gabarito
+        answer_key = get_answer_key(exam.id)
+        score = grade_participants(
+            exam.id, answer_key, [participant.id])[participant.id]
+        max_score = len(answer_key)
 
         # Salvar o resultado
         result, created = Result.objects.update_or_create(
@@ -41,3 +45,184 @@ def calculate_exam_result(participant_id: int, exam_id: int):
         raise ValueError("Exam not found.")
     except Exception as e:
         raise RuntimeError(f"Error while calculating results: {e}")
+
+
+def calculate_exam_results(exam_id: int):
+    """
+    Calculate the results of an exam for every enrolled participant at once.
+
+    Scores are computed in one pass by the configured grading backend against
+    the exam's answer key and saved with one bulk upsert on
+    ``(participant, exam)``.
+    """
+    try:
+        exam = Exam.objects.get(id=exam_id)
+
+        answer_key = get_answer_key(exam.id)
+        max_score = len(answer_key)
+        scores = grade_participants(exam.id, answer_key)
+
+        # Salvar todos os resultados de uma vez
+        save_exam_results(exam.id, scores, max_score)
+
+        return {
+            "exam": exam.name,
+            "participants": len(scores),
+            "max_score": max_score,
+        }
+
+    except Exam.DoesNotExist:
+        raise ValueError("Exam not found.")
+    except Exception as e:
+        raise RuntimeError(f"Error while calculating results: {e}")
+
+
+def save_exam_results(exam_id: int, scores: dict, max_score: int, refresh_ranking: bool = True):
+    """
+    Save the scores of an exam's participants with one bulk upsert.
+
+    The exam's rankings are recomputed afterwards unless ``refresh_ranking``
+    is ``False``, for callers that save several chunks before refreshing
+    them once.
+    """
+    results = [
+        Result(
+            participant_id=participant_id,
+            exam_id=exam_id,
+            score=score,
+            max_score=max_score,
+        )
+        for participant_id, score in scores.items()
+    ]
+    Result.objects.bulk_create(
+        results,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["participant", "exam"],
+        update_fields=["score", "max_score", "updated_at"],
+    )
+    if refresh_ranking:
+        refresh_exam_rankings(exam_id)
+
+
+def refresh_exam_rankings(exam_id: int):
+    """
+    Recompute the exam's ranking after commit and rebuild the standings of every series containing it.
+    """
+    invalidate_ranking(exam_id)
+    refresh_exam_series(exam_id)
+
+
+def get_exam_result(participant_id: int, exam_id: int):
+    """
+    Read the incrementally maintained result of a participant's exam.
+
+    Falls back to a full correction when no result has been recorded yet.
+    """
+    result = (
+        Result.objects.select_related("participant__user", "exam")
+        .filter(participant_id=participant_id, exam_id=exam_id)
+        .first()
+    )
+    if result is None:
+        return calculate_exam_result(participant_id, exam_id)
+
+    return {
+        "participant": result.participant.user.username,
+        "exam": result.exam.name,
+        "score": result.score,
+        "max_score": result.max_score,
+    }
+
+
+def save_answers(participant_id: int, exam_id: int, choices):
+    """
+    Upsert the participant's answers to the given choices of an exam.
+
+    Runs in one transaction. With incremental scoring, the participant's
+    result row is locked (and created if needed) first, which serializes
+    concurrent writers of the same participant and exam. The answers being
+    replaced are then read, all answers are written with one ``INSERT ... ON
+    CONFLICT (participant_id, question_id) DO UPDATE``, and the score change
+    is applied to the result and the participant's series standings.
+    Without incremental scoring only the read and the upsert run; the
+    upsert alone keeps concurrent submissions off the unique constraint.
+    """
+    with transaction.atomic():
+        result = None
+        if settings.INCREMENTAL_SCORING:
+            result = lock_exam_result(participant_id, exam_id)
+
+        existing = {
+            question_id: (created_at, choice_id)
+            for question_id, created_at, choice_id in Answer.objects.filter(
+                participant_id=participant_id,
+                question_id__in=[choice.question_id for choice in choices],
+            ).values_list("question_id", "created_at", "choice_id")
+        }
+        answers = Answer.objects.bulk_create(
+            [
+                Answer(
+                    participant_id=participant_id,
+                    question_id=choice.question_id,
+                    choice_id=choice.id,
+                )
+                for choice in choices
+            ],
+            update_conflicts=True,
+            unique_fields=["participant", "question"],
+            update_fields=["choice", "updated_at"],
+        )
+        # O upsert mantém o created_at original das respostas já existentes
+        for answer in answers:
+            if answer.question_id in existing:
+                answer.created_at = existing[answer.question_id][0]
+
+        if result is not None:
+            # Mesmo gabarito da correção completa, para que todos os caminhos concordem
+            correct_ids = correct_choice_ids(get_answer_key(exam_id))
+            delta = sum(
+                int(choice.id in correct_ids)
+                - int(choice.question_id in existing and existing[choice.question_id][1] in correct_ids)
+                for choice in choices
+            )
+            apply_result_score_delta(result, delta)
+
+    return answers
+
+
+def lock_exam_result(participant_id: int, exam_id: int):
+    """
+    Lock the participant's result for an exam, creating it if needed.
+
+    Must run inside a transaction. A result created here is graded from the
+    answers already stored, so later deltas apply on top of it.
+    """
+    result, _ = Result.objects.select_for_update().get_or_create(
+        participant_id=participant_id,
+        exam_id=exam_id,
+        # Um participante removido não é pontuado; a criação falha na chave estrangeira
+        defaults={
+            "score": lambda: grade_participants(
+                exam_id, get_answer_key(exam_id), [participant_id]).get(participant_id, 0),
+            "max_score": lambda: len(get_answer_key(exam_id)),
+        },
+    )
+    return result
+
+
+def apply_result_score_delta(result, delta: int):
+    """
+    Add ``delta`` to a locked result and to the participant's series standings.
+
+    Only the participant's own rows are written; the exam's ranks are
+    recomputed after the transaction commits.
+    """
+    if delta:
+        Result.objects.filter(pk=result.pk).update(
+            score=F("score") + delta, updated_at=timezone.now())
+        apply_series_delta(result.exam_id, result.participant_id, delta, 0)
+        invalidate_ranking(result.exam_id)
+        result.score += delta
+
+    return result
@@ -0,0 +1,158 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from api.answer_key import invalidate_answer_key
+from api.cache import bump_version
+from api.enrollment import invalidate_enrollment
+from api.leaderboard import apply_series_delta, refresh_exam_series, refresh_series_standings
+from api.models import Choice, Exam, ExamSeries, Participant, Question, Result, User
+from api.ranking import invalidate_ranking, ranking_namespace
+
+
+@receiver(post_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+def invalidate_exam_answer_key(sender, instance, created=False, **kwargs):
+    # Só a criação ou remoção da prova pode tornar um gabarito em cache inválido
+    if created or kwargs.get("signal") is post_delete:
+        invalidate_answer_key(instance.id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_answer_key(sender, instance, **kwargs):
+    invalidate_answer_key(instance.exam_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def invalidate_choice_answer_key(sender, instance, **kwargs):
+    if Choice.question.is_cached(instance):
+        exam_id = instance.question.exam_id
+    else:
+        exam_id = (
+            Question.objects.filter(id=instance.question_id)
+            .values_list("exam_id", flat=True)
+            .first()
+        )
+    # Se a questão já foi removida, a própria remoção invalidou o gabarito
+    if exam_id is not None:
+        invalidate_answer_key(exam_id)
+
+
+@receiver(post_save, sender=Result)
+def update_standings_after_result_save(sender, instance, created, **kwargs):
+    if created:
+        apply_series_delta(
+            instance.exam_id, instance.participant_id, instance.score, instance.max_score)
+    elif hasattr(instance, "_loaded_score"):
+        apply_series_delta(
+            instance.exam_id,
+            instance.participant_id,
+            instance.score - instance._loaded_score,
+            instance.max_score - instance._loaded_max_score,
+        )
+    else:
+        refresh_exam_series(instance.exam_id)
+    instance._loaded_score = instance.score
+    instance._loaded_max_score = instance.max_score
+    invalidate_ranking(instance.exam_id)
+
+
+@receiver(post_delete, sender=Result)
+def update_standings_after_result_delete(sender, instance, origin=None, **kwargs):
+    # Ao remover a prova inteira não há ranking a recalcular
+    if isinstance(origin, Exam):
+        bump_version(ranking_namespace(instance.exam_id))
+        return
+    invalidate_ranking(instance.exam_id)
+    # Ao remover o participante ou o usuário, as classificações afetadas são
+    # removidas em cascata
+    if isinstance(origin, (Participant, User)):
+        return
+    apply_series_delta(
+        instance.exam_id, instance.participant_id, -instance.score, -instance.max_score)
+
+
+@receiver(pre_delete, sender=Exam)
+def remember_exam_relations(sender, instance, **kwargs):
+    instance._series_ids = list(instance.series.values_list("id", flat=True))
+    instance._participant_ids = list(
+        instance.participants.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Exam)
+def refresh_series_after_exam_delete(sender, instance, **kwargs):
+    for series_id in getattr(instance, "_series_ids", []):
+        refresh_series_standings(series_id)
+    invalidate_enrollment(*getattr(instance, "_participant_ids", []))
+
+
+@receiver(m2m_changed, sender=ExamSeries.exams.through)
+def refresh_series_after_exams_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        refresh_series_standings(instance.id)
+    else:
+        for series_id in pk_set or []:
+            refresh_series_standings(series_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_caches(sender, instance, **kwargs):
+    bump_version("users")
+
+
+@receiver(post_save, sender=User)
+def invalidate_rankings_after_rename(sender, instance, created, update_fields=None, **kwargs):
+    # Os rankings exibem o nome de usuário; logins só gravam o last_login
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+    if getattr(instance, "_loaded_username", None) == instance.username:
+        return
+    exam_ids = (
+        Result.objects.filter(participant__user=instance)
+        .values_list("exam_id", flat=True)
+        .distinct()
+    )
+    for exam_id in exam_ids:
+        bump_version(ranking_namespace(exam_id))
+    instance._loaded_username = instance.username
+
+
+@receiver(post_delete, sender=Participant)
+def invalidate_deleted_participant_enrollment(sender, instance, **kwargs):
+    invalidate_enrollment(instance.id)
+
+
+@receiver(m2m_changed, sender=Participant.exams.through)
+def invalidate_participant_enrollment(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        participant_ids = [instance.id]
+    elif action == "pre_clear":
+        # Os participantes só são conhecidos antes do clear
+        instance._participant_ids = list(
+            instance.participants.values_list("id", flat=True))
+        return
+    elif action == "post_clear":
+        participant_ids = getattr(instance, "_participant_ids", [])
+    else:
+        participant_ids = pk_set or []
+
+    if action.startswith("post_"):
+        invalidate_enrollment(*participant_ids)
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+@receiver(m2m_changed, sender=Participant.exams.through)
+def invalidate_participant_caches(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("post_"):
+        bump_version("participants")
+
+
+@receiver(post_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+def invalidate_exam_caches(sender, instance, **kwargs):
+    bump_version("exams")
@@ -0,0 +1,28 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+
+from api.api_auth import AuthBearer
+from api.revocation import revoked_jtis
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with empty caches, since cached views outlive the test database."""
+    cache.clear()
+    AuthBearer.token_cache.clear()
+    revoked_jtis.reset()
+    yield
+    cache.clear()
+    AuthBearer.token_cache.clear()
+    revoked_jtis.reset()
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    """Make concurrent SQLite writers in threaded tests wait for the write lock instead of failing."""
+    for connection in connections.all():
+        if connection.vendor == "sqlite":
+            # Transações IMMEDIATE pegam o lock de escrita no início
+            connection.settings_dict["OPTIONS"].update(
+                transaction_mode="IMMEDIATE", timeout=30)
@@ -1,5 +1,14 @@
 import pytest
-from api.models import Answer, Exam, Participant, Question, Choice, User
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection
+from django.test import Client
+from api.answer_buffer import flush_pending_answers
+from api.answer_key import get_answer_key
+from api.grading import grade_with_numpy, grade_with_sql
+from api.models import (
+    Answer, Choice, Exam, ExamSeries, Participant, PendingAnswer, Question, Result, SeriesStanding, User,
+)
+from api.services import calculate_exam_result
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
@@ -137,3 +146,300 @@ def test_update_answer_unauthorized(client, create_answer):
     response = client.put(url, payload, content_type="application/json")
     assert response.status_code == 401
     assert response.json().get("detail") == "Unauthorized"
+
+
+@pytest.mark.django_db
+def test_answer_writes_update_result_incrementally(
+    client, create_participant_with_exam_and_question, get_token
+):
+    """Test that answer writes keep the participant's result up to date."""
+    data = create_participant_with_exam_and_question
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {get_token['access']}"}
+    payload = {
+        "participant_id": data["participant"].id,
+        "question_id": data["question"].id,
+        "choice_id": data["choices"][0].id,
+    }
+    response = client.post(
+        "/api/answers/", payload, content_type="application/json", **headers)
+    assert response.status_code == 201
+    answer_id = response.json()["id"]
+
+    result = Result.objects.get(
+        participant=data["participant"], exam=data["exam"])
+    assert result.score == 1
+    assert result.max_score == 1
+
+    response = client.put(
+        f"/api/answers/{answer_id}/",
+        {"choice_id": data["choices"][1].id},
+        content_type="application/json",
+        **headers,
+    )
+    assert response.status_code == 200
+    result.refresh_from_db()
+    assert result.score == 0
+
+    # Reenviar a mesma resposta não altera a pontuação
+    payload["choice_id"] = data["choices"][1].id
+    response = client.post(
+        "/api/answers/", payload, content_type="application/json", **headers)
+    assert response.status_code == 201
+    assert response.json()["id"] == answer_id
+    result.refresh_from_db()
+    assert result.score == 0
+
+    url = f"/api/corrections/{data['participant'].id}/exam/{data['exam'].id}/?mode=incremental"
+    response = client.post(url)
+    assert response.status_code == 200
+    assert response.json()["score"] == 0
+    assert response.json()["max_score"] == 1
+
+
+@pytest.mark.django_db
+def test_every_correct_choice_scores_on_every_path(
+    client, create_participant_with_exam_and_question, get_token
+):
+    """Test that a question with two correct choices is scored alike by every grading path."""
+    data = create_participant_with_exam_and_question
+    exam_id = data["exam"].id
+    second_correct = Choice.objects.create(
+        question=data["question"], text="Paris, France", is_correct=True)
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {get_token['access']}"}
+    payload = {
+        "participant_id": data["participant"].id,
+        "question_id": data["question"].id,
+        "choice_id": second_correct.id,
+    }
+    response = client.post(
+        "/api/answers/", payload, content_type="application/json", **headers)
+    assert response.status_code == 201
+    assert Result.objects.get(
+        participant=data["participant"], exam=data["exam"]).score == 1
+
+    # Trocar por outra alternativa correta não altera a pontuação
+    payload["choice_id"] = data["choices"][0].id
+    response = client.post(
+        "/api/answers/", payload, content_type="application/json", **headers)
+    assert response.status_code == 201
+    assert Result.objects.get(
+        participant=data["participant"], exam=data["exam"]).score == 1
+
+    payload["choice_id"] = second_correct.id
+    client.post("/api/answers/", payload, content_type="application/json", **headers)
+    assert calculate_exam_result(data["participant"].id, exam_id)["score"] == 1
+
+    answer_key = get_answer_key(exam_id)
+    expected = {data["participant"].id: 1}
+    assert grade_with_sql(exam_id, answer_key) == expected
+    pytest.importorskip("numpy")
+    assert grade_with_numpy(exam_id, answer_key) == expected
+
+
+@pytest.mark.django_db
+def test_submit_answer_sheet(client, create_participant_with_exam_and_question, get_token):
+    """Test that a whole answer sheet is upserted and scored in one request."""
+    data = create_participant_with_exam_and_question
+    second = Question.objects.create(exam=data["exam"], text="2 + 2?")
+    right = Choice.objects.create(question=second, text="4", is_correct=True)
+    wrong = Choice.objects.create(question=second, text="5", is_correct=False)
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {get_token['access']}"}
+    payload = {
+        "exam_id": data["exam"].id,
+        "answers": [
+            {"question_id": data["question"].id, "choice_id": data["choices"][0].id},
+            {"question_id": second.id, "choice_id": wrong.id},
+        ],
+    }
+    response = client.post(
+        "/api/answers/batch/", payload, content_type="application/json", **headers)
+    assert response.status_code == 201
+    assert [a["choice_id"] for a in response.json()] == [
+        data["choices"][0].id, wrong.id]
+    result = Result.objects.get(participant=data["participant"], exam=data["exam"])
+    assert result.score == 1
+    assert result.max_score == 2
+
+    payload["answers"][1]["choice_id"] = right.id
+    response = client.post(
+        "/api/answers/batch/", payload, content_type="application/json", **headers)
+    assert response.status_code == 201
+    assert Answer.objects.filter(participant=data["participant"]).count() == 2
+    result.refresh_from_db()
+    assert result.score == 2
+
+
+@pytest.mark.django_db
+def test_submit_answer_sheet_rejects_invalid_choices(
+    client, create_participant_with_exam_and_question, get_token
+):
+    """Test that choices outside the exam or question reject the whole sheet."""
+    data = create_participant_with_exam_and_question
+    other_exam = Exam.objects.create(
+        name="Other", start_date="2024-01-01T10:00:00Z", end_date="2024-01-01T12:00:00Z")
+    other = Question.objects.create(exam=other_exam, text="Other?")
+    other_choice = Choice.objects.create(question=other, text="X", is_correct=True)
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {get_token['access']}"}
+    payload = {
+        "exam_id": data["exam"].id,
+        "answers": [
+            {"question_id": data["question"].id, "choice_id": data["choices"][0].id},
+            {"question_id": other.id, "choice_id": other_choice.id},
+        ],
+    }
+    response = client.post(
+        "/api/answers/batch/", payload, content_type="application/json", **headers)
+    assert response.status_code == 400
+    assert response.json()["question_ids"] == [other.id]
+    assert not Answer.objects.exists()
+
+    payload["exam_id"] = other_exam.id
+    response = client.post(
+        "/api/answers/batch/", payload, content_type="application/json", **headers)
+    assert response.status_code == 400
+    assert response.json()["error"] == "You are not allowed to answer this exam."
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_answer_submissions(create_participant_with_exam_and_question, get_token):
+    """Test that parallel submissions of the same answer neither fail nor duplicate it."""
+
+    data = create_participant_with_exam_and_question
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {get_token['access']}"}
+
+    def submit(index):
+        try:
+            payload = {
+                "participant_id": data["participant"].id,
+                "question_id": data["question"].id,
+                "choice_id": data["choices"][index % 2].id,
+            }
+            return Client().post(
+                "/api/answers/", payload, content_type="application/json", **headers
+            ).status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        statuses = list(executor.map(submit, range(16)))
+
+    assert statuses == [201] * 16
+    answer = Answer.objects.get(participant=data["participant"], question=data["question"])
+    result = Result.objects.get(participant=data["participant"], exam=data["exam"])
+    assert result.score == int(answer.choice.is_correct)
+
+
+@pytest.mark.django_db
+def test_enrollment_cache_follows_exam_changes(
+    client, create_participant, create_exam_and_question, get_token
+):
+    """Test that the cached enrollment is dropped when the participant's exams change."""
+    data = create_exam_and_question
+    participant = create_participant
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {get_token['access']}"}
+    payload = {
+        "participant_id": participant.id,
+        "question_id": data["question"].id,
+        "choice_id": data["choices"][0].id,
+    }
+    response = client.post(
+        "/api/answers/", payload, content_type="application/json", **headers)
+    assert response.status_code == 400
+
+    data["exam"].participants.add(participant)
+    response = client.post(
+        "/api/answers/", payload, content_type="application/json", **headers)
+    assert response.status_code == 201
+    response = client.get("/api/exams/me/", **headers)
+    assert [exam["id"] for exam in response.json()] == [data["exam"].id]
+
+    data["exam"].participants.clear()
+    response = client.get("/api/exams/me/", **headers)
+    assert response.json() == []
+    response = client.post(
+        "/api/answers/", payload, content_type="application/json", **headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_write_behind_answers(
+    client, settings, create_participant_with_exam_and_question, get_token
+):
+    """Test that queued answers are visible to their author and applied on flush."""
+    settings.ANSWER_WRITE_BEHIND = True
+    data = create_participant_with_exam_and_question
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {get_token['access']}"}
+    payload = {
+        "participant_id": data["participant"].id,
+        "question_id": data["question"].id,
+        "choice_id": data["choices"][1].id,
+    }
+    for choice in data["choices"][::-1]:
+        payload["choice_id"] = choice.id
+        response = client.post(
+            "/api/answers/", payload, content_type="application/json", **headers)
+        assert response.status_code == 202
+    assert not Answer.objects.exists()
+
+    response = client.get(f"/api/answers/exam/{data['exam'].id}/", **headers)
+    assert response.status_code == 200
+    [answer] = response.json()
+    assert answer["choice_id"] == data["choices"][0].id
+    assert answer["pending"] is True
+
+    assert flush_pending_answers() == 2
+    assert not PendingAnswer.objects.exists()
+    answer = Answer.objects.get(participant=data["participant"])
+    assert answer.choice == data["choices"][0]
+    result = Result.objects.get(participant=data["participant"], exam=data["exam"])
+    assert result.score == 1
+
+    response = client.get(f"/api/answers/exam/{data['exam'].id}/", **headers)
+    assert response.json()[0]["pending"] is False
+
+
+@pytest.mark.django_db
+def test_flush_applies_series_deltas(create_participant_with_exam_and_question, monkeypatch):
+    """Test that a flush adds the batch's score changes to the series without rebuilding them."""
+    import api.services
+
+    data = create_participant_with_exam_and_question
+    series = ExamSeries.objects.create(name="Series")
+    series.exams.add(data["exam"])
+    monkeypatch.setattr(api.services, "refresh_exam_series", None)
+
+    for choice in (data["choices"][0], data["choices"][1]):
+        PendingAnswer.objects.create(
+            participant=data["participant"], question=data["question"], choice=choice)
+        assert flush_pending_answers() == 1
+
+        standing = SeriesStanding.objects.get(series=series, participant=data["participant"])
+        assert standing.total_score == int(choice.is_correct)
+        assert standing.max_score == 1
+
+
+@pytest.mark.django_db
+def test_answer_retry_with_idempotency_key(
+    client, create_participant_with_exam_and_question, get_token, django_assert_num_queries
+):
+    """Test that a retried answer with the same Idempotency-Key replays the first response."""
+    data = create_participant_with_exam_and_question
+    headers = {
+        "HTTP_AUTHORIZATION": f"Bearer {get_token['access']}",
+        "HTTP_IDEMPOTENCY_KEY": "retry-1",
+    }
+    payload = {
+        "participant_id": data["participant"].id,
+        "question_id": data["question"].id,
+        "choice_id": data["choices"][0].id,
+    }
+    response = client.post(
+        "/api/answers/", payload, content_type="application/json", **headers)
+    assert response.status_code == 201
+
+    with django_assert_num_queries(0):
+        retry = client.post(
+            "/api/answers/", payload, content_type="application/json", **headers)
+    assert retry.status_code == 201
+    assert retry.json() == response.json()
+    assert retry["Idempotent-Replayed"] == "true"
@@ -0,0 +1,91 @@
+import pytest
+from api.answer_key import get_answer_key
+from api.models import Choice, Exam, Question
+
+
+@pytest.fixture
+def create_exam_with_questions(db):
+    """Fixture to create an exam with two questions."""
+    exam = Exam.objects.create(
+        name="Answer Key Exam",
+        description="Test Description",
+        start_date="2024-01-01T10:00:00Z",
+        end_date="2024-01-02T10:00:00Z",
+    )
+    question1 = Question.objects.create(exam=exam, text="What is 2 + 2?")
+    correct = Choice.objects.create(
+        question=question1, text="4", is_correct=True)
+    wrong = Choice.objects.create(
+        question=question1, text="5", is_correct=False)
+    question2 = Question.objects.create(exam=exam, text="Open question")
+    return {
+        "exam": exam,
+        "questions": [question1, question2],
+        "choices": [correct, wrong],
+    }
+
+
+@pytest.mark.django_db
+def test_get_answer_key(create_exam_with_questions):
+    """Test the answer key maps each question to its correct choices."""
+    data = create_exam_with_questions
+    answer_key = get_answer_key(data["exam"].id)
+    assert answer_key == {
+        data["questions"][0].id: frozenset({data["choices"][0].id}),
+        data["questions"][1].id: frozenset(),
+    }
+
+
+@pytest.mark.django_db
+def test_get_answer_key_is_cached(create_exam_with_questions, django_assert_num_queries):
+    """Test the answer key is read from the cache after the first build."""
+    exam = create_exam_with_questions["exam"]
+    get_answer_key(exam.id)
+    with django_assert_num_queries(0):
+        get_answer_key(exam.id)
+
+
+@pytest.mark.django_db
+def test_answer_key_invalidated_by_choice_change(create_exam_with_questions):
+    """Test the answer key is rebuilt when a choice changes."""
+    data = create_exam_with_questions
+    question = data["questions"][0]
+    get_answer_key(data["exam"].id)
+
+    data["choices"][0].is_correct = False
+    data["choices"][0].save()
+    data["choices"][1].is_correct = True
+    data["choices"][1].save()
+    assert get_answer_key(data["exam"].id)[question.id] == {data["choices"][1].id}
+
+    data["choices"][1].delete()
+    assert get_answer_key(data["exam"].id)[question.id] == frozenset()
+
+
+@pytest.mark.django_db
+def test_answer_key_invalidated_by_question_change(create_exam_with_questions):
+    """Test the answer key is rebuilt when questions are added or removed."""
+    data = create_exam_with_questions
+    get_answer_key(data["exam"].id)
+
+    question = Question.objects.create(exam=data["exam"], text="New question")
+    assert question.id in get_answer_key(data["exam"].id)
+
+    data["questions"][0].delete()
+    assert data["questions"][0].id not in get_answer_key(data["exam"].id)
+
+
+@pytest.mark.django_db
+def test_answer_key_invalidated_again_on_commit(create_exam_with_questions, django_capture_on_commit_callbacks):
+    """Test a key rebuilt before the writing transaction commits is not kept."""
+    data = create_exam_with_questions
+    question = data["questions"][0]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        data["choices"][0].is_correct = False
+        data["choices"][0].save()
+        # Leitura concorrente antes do commit: o gabarito reconstruído fica em cache
+        get_answer_key(data["exam"].id)
+        Choice.objects.filter(id=data["choices"][1].id).update(is_correct=True)
+
+    assert get_answer_key(data["exam"].id)[question.id] == {data["choices"][1].id}
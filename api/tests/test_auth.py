@@ -1,7 +1,18 @@
+import csv
+import io
+from datetime import timedelta
+
 import pytest
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
-from api.models import User
+from api.api_auth import AuthBearer
+from api.enrollment import get_request_exam_ids, get_request_participant_id
+from api.models import Choice, Exam, Participant, Question, RevokedToken, User
+from api.revocation import BloomFilter, compact_revoked_tokens, is_revoked
 
 
 @pytest.mark.django_db
@@ -40,3 +51,315 @@ def test_refresh_token(client, db):
     data = response.json()
     assert "access" in data
     assert "refresh" in data
+
+
+@pytest.mark.django_db
+def test_login_tokens_carry_claims(client):
+    """Test that login tokens carry the user's role and participant id."""
+    user = User.objects.create_user(username="testuser", password="password123")
+    participant = Participant.objects.create(user=user)
+    payload = {"username": "testuser", "password": "password123"}
+    response = client.post("/api/auth/login", payload, content_type="application/json")
+    access = AccessToken(response.json()["access"])
+    assert access["role"] == "participant"
+    assert access["participant_id"] == participant.id
+
+
+@pytest.mark.django_db
+def test_stateless_authentication(client, settings, django_assert_num_queries):
+    """Test that stateless mode authenticates from the token and loads the user lazily."""
+    settings.STATELESS_JWT_AUTH = True
+    user = User.objects.create_user(
+        username="testuser", email="test@example.com", password="password123")
+    payload = {"username": "testuser", "password": "password123"}
+    access = client.post(
+        "/api/auth/login", payload, content_type="application/json").json()["access"]
+
+    request = RequestFactory().get("/")
+    with django_assert_num_queries(0):
+        token_user = AuthBearer().authenticate(request, access)
+        assert token_user.id == user.id
+        assert token_user.role == "participant"
+        assert request.auth_token.get("participant_id") is None
+        assert request.user is token_user
+
+    with django_assert_num_queries(1):
+        assert token_user.email == "test@example.com"
+        assert token_user.username == "testuser"
+
+    response = client.get("/api/exams/me/", HTTP_AUTHORIZATION=f"Bearer {access}")
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_validated_tokens_are_cached(settings, django_assert_num_queries):
+    """Test that a reused access token skips verification but keeps the configured user type."""
+    user = User.objects.create_user(username="testuser", password="password123")
+    access = str(RefreshToken.for_user(user).access_token)
+
+    first = AuthBearer().authenticate(RequestFactory().get("/"), access)
+    assert first == user
+    request = RequestFactory().get("/")
+    with django_assert_num_queries(1):
+        second = AuthBearer().authenticate(request, access)
+    assert isinstance(second, User)
+    assert request.user == user
+    assert AuthBearer.token_cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    settings.STATELESS_JWT_AUTH = True
+    with django_assert_num_queries(0):
+        third = AuthBearer().authenticate(RequestFactory().get("/"), access)
+    assert not isinstance(third, User)
+    assert third.id == user.id
+
+    assert AuthBearer().authenticate(RequestFactory().get("/"), "invalid") is None
+    assert AuthBearer.token_cache.stats()["size"] == 1
+
+
+@pytest.mark.django_db
+def test_token_cache_stats_endpoint(client):
+    """Test that admins read the token cache counters and other users are refused."""
+    user = User.objects.create_user(username="testuser", password="password123")
+    admin = User.objects.create_user(username="admin", password="password123", role="admin")
+    url = "/api/auth/token-cache"
+
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+    assert client.get(url, **headers).status_code == 403
+
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(admin).access_token}"}
+    client.get(url, **headers)
+    response = client.get(url, **headers)
+    assert response.status_code == 200
+    assert response.json() == {"hits": 1, "misses": 2, "size": 2}
+
+
+@pytest.mark.django_db
+def test_participant_claims(client, monkeypatch, django_assert_num_queries):
+    """Test that participant claims are read without queries until they go stale."""
+    monkeypatch.setattr("api.enrollment.is_shared_cache", lambda: True)
+    user = User.objects.create_user(username="testuser", password="password123")
+    participant = Participant.objects.create(user=user)
+    exam = Exam.objects.create(
+        name="Exam", start_date="2024-01-01T10:00:00Z", end_date="2024-01-01T12:00:00Z")
+    participant.exams.add(exam)
+    payload = {"username": "testuser", "password": "password123"}
+    tokens = client.post(
+        "/api/auth/login", payload, content_type="application/json").json()
+    assert AccessToken(tokens["access"])["exam_ids"] == [exam.id]
+
+    request = RequestFactory().get("/")
+    AuthBearer().authenticate(request, tokens["access"])
+    with django_assert_num_queries(0):
+        assert get_request_participant_id(request) == participant.id
+        assert get_request_exam_ids(request) == {exam.id}
+
+    participant.exams.remove(exam)
+    request = RequestFactory().get("/")
+    AuthBearer().authenticate(request, tokens["access"])
+    assert get_request_exam_ids(request) == frozenset()
+
+    response = client.post(
+        "/api/auth/refresh", {"refresh": tokens["refresh"]}, content_type="application/json")
+    assert AccessToken(response.json()["access"])["exam_ids"] == []
+
+
+@pytest.mark.django_db
+def test_participant_claims_need_current_shared_version(client, monkeypatch, django_assert_num_queries):
+    """Test that exam claims fall back to the database without a shared, current version."""
+    from django.core.cache import cache
+
+    user = User.objects.create_user(username="testuser", password="password123")
+    participant = Participant.objects.create(user=user)
+    exam = Exam.objects.create(
+        name="Exam", start_date="2024-01-01T10:00:00Z", end_date="2024-01-01T12:00:00Z")
+    participant.exams.add(exam)
+    payload = {"username": "testuser", "password": "password123"}
+    access = client.post(
+        "/api/auth/login", payload, content_type="application/json").json()["access"]
+
+    # Outro processo remove a inscrição sem que este veja a versão mudar
+    Participant.exams.through.objects.filter(participant=participant).delete()
+
+    request = RequestFactory().get("/")
+    AuthBearer().authenticate(request, access)
+    # O participant_id não muda, então a claim vale mesmo com o cache local
+    with django_assert_num_queries(0):
+        assert get_request_participant_id(request) == participant.id
+    assert get_request_exam_ids(request) == frozenset()
+
+    monkeypatch.setattr("api.enrollment.is_shared_cache", lambda: True)
+    cache.clear()
+    request = RequestFactory().get("/")
+    AuthBearer().authenticate(request, access)
+    assert get_request_exam_ids(request) == frozenset()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_for_deleted_participant_claim(client, monkeypatch):
+    """Test that a write for a participant removed after the token was issued returns 404 at commit."""
+    user = User.objects.create_user(username="testuser", password="password123")
+    participant = Participant.objects.create(user=user)
+    exam = Exam.objects.create(
+        name="Exam", start_date="2024-01-01T10:00:00Z", end_date="2024-01-01T12:00:00Z")
+    question = Question.objects.create(exam=exam, text="Question")
+    choice = Choice.objects.create(question=question, text="Choice", is_correct=True)
+    participant.exams.add(exam)
+    payload = {"username": "testuser", "password": "password123"}
+    access = client.post(
+        "/api/auth/login", payload, content_type="application/json").json()["access"]
+
+    participant_id = participant.id
+    participant.delete()
+    # Simula uma verificação de inscrição feita antes da remoção
+    monkeypatch.setattr("api.api_answer.get_request_exam_ids", lambda request: {exam.id})
+    response = client.post(
+        "/api/answers/",
+        {"participant_id": participant_id, "question_id": question.id, "choice_id": choice.id},
+        content_type="application/json",
+        HTTP_AUTHORIZATION=f"Bearer {access}",
+    )
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def cohort(db):
+    """Create an open exam with two enrolled participants and a second exam."""
+    exam = Exam.objects.create(
+        name="Cohort Exam",
+        start_date=timezone.now(),
+        end_date=timezone.now() + timedelta(hours=2),
+    )
+    other = Exam.objects.create(
+        name="Other Exam",
+        start_date=timezone.now(),
+        end_date=timezone.now() + timedelta(hours=2),
+    )
+    participants = []
+    for index in range(2):
+        user = User.objects.create_user(username=f"student{index}", password="password123")
+        participant = Participant.objects.create(user=user)
+        participant.exams.add(exam, other)
+        participants.append(participant)
+    return {"exam": exam, "other": other, "participants": participants}
+
+
+@pytest.mark.django_db
+def test_issue_cohort_tokens(client, cohort):
+    """Test that admins pre-issue exam-scoped tokens for the whole cohort."""
+    exam = cohort["exam"]
+    admin = User.objects.create_user(username="admin", password="password123", role="admin")
+    student = cohort["participants"][0].user
+    url = f"/api/auth/cohort/{exam.id}"
+
+    response = client.post(
+        url, HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(student).access_token}")
+    assert response.status_code == 403
+
+    response = client.post(
+        url, HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(admin).access_token}")
+    assert response.status_code == 200
+    tokens = response.json()
+    assert [token["username"] for token in tokens] == ["student0", "student1"]
+
+    access = AccessToken(tokens[0]["access"])
+    lifetime = jwt_settings.ACCESS_TOKEN_LIFETIME
+    assert access["exp"] <= int((timezone.now() + lifetime).timestamp())
+    assert access["exp"] < int(exam.end_date.timestamp())
+    assert access["exam_scope"] == exam.id
+
+    response = client.post(
+        "/api/auth/refresh", {"refresh": tokens[0]["refresh"]}, content_type="application/json")
+    assert AccessToken(response.json()["access"])["exam_scope"] == exam.id
+
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {tokens[0]['access']}"}
+    for target, status in [(exam, 201), (cohort["other"], 400)]:
+        question = Question.objects.create(exam=target, text="?")
+        choice = Choice.objects.create(question=question, text="!", is_correct=True)
+        payload = {
+            "participant_id": cohort["participants"][0].id,
+            "question_id": question.id,
+            "choice_id": choice.id,
+        }
+        response = client.post(
+            "/api/answers/", payload, content_type="application/json", **headers)
+        assert response.status_code == status
+
+
+@pytest.mark.django_db
+def test_cohort_tokens_not_valid_before_exam_start(client, cohort):
+    """Test that tokens handed out early are refused until shortly before the exam starts."""
+    from api.tokens import COHORT_TOKEN_NBF_SKEW, issue_cohort_tokens
+
+    exam = cohort["exam"]
+    exam.start_date = timezone.now() + timedelta(hours=3)
+    exam.end_date = exam.start_date + timedelta(hours=2)
+    exam.save()
+
+    [pair, _] = issue_cohort_tokens(exam)
+    nbf = int((exam.start_date - COHORT_TOKEN_NBF_SKEW).timestamp())
+    assert AccessToken(pair["access"], verify=False)["nbf"] == nbf
+    lifetime = jwt_settings.ACCESS_TOKEN_LIFETIME
+    assert AccessToken(pair["access"], verify=False)["exp"] == int(
+        (exam.start_date + lifetime).timestamp())
+
+    response = client.get("/api/exams/me/", HTTP_AUTHORIZATION=f"Bearer {pair['access']}")
+    assert response.status_code == 401
+    response = client.post(
+        "/api/auth/refresh", {"refresh": pair["refresh"]}, content_type="application/json")
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_issue_cohort_tokens_command(cohort):
+    """Test that the command signs the cohort's tokens on a process pool."""
+    output = io.StringIO()
+    call_command(
+        "issue_cohort_tokens", cohort["exam"].id, "--workers", "2", "--chunk-size", "1",
+        stdout=output)
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert [row["participant_id"] for row in rows] == [
+        str(participant.id) for participant in cohort["participants"]]
+    assert AccessToken(rows[1]["access"])["participant_id"] == cohort["participants"][1].id
+
+
+@pytest.mark.django_db
+def test_refresh_token_rotation_revokes_used_token(client, django_assert_num_queries):
+    """Test that a refresh token cannot be used again after rotation."""
+    user = User.objects.create_user(username="testuser", password="password123")
+    refresh = str(RefreshToken.for_user(user))
+    url = "/api/auth/refresh"
+
+    response = client.post(url, {"refresh": refresh}, content_type="application/json")
+    assert response.status_code == 200
+    rotated = response.json()["refresh"]
+    assert rotated != refresh
+
+    response = client.post(url, {"refresh": refresh}, content_type="application/json")
+    assert response.status_code == 401
+
+    # Tokens não revogados passam pelo filtro sem consultar a tabela
+    with django_assert_num_queries(0):
+        assert not is_revoked(RefreshToken(rotated))
+
+    response = client.post(url, {"refresh": rotated}, content_type="application/json")
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_compact_revoked_tokens():
+    """Test that compaction only removes revocations of expired tokens."""
+    RevokedToken.objects.create(jti="old", expires_at=timezone.now() - timedelta(hours=1))
+    RevokedToken.objects.create(jti="new", expires_at=timezone.now() + timedelta(hours=1))
+    assert compact_revoked_tokens() == 1
+    assert list(RevokedToken.objects.values_list("jti", flat=True)) == ["new"]
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test that every added item is reported as present."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+    assert false_positives < 50
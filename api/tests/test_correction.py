@@ -1,5 +1,6 @@
 import pytest
-from api.models import Participant, Result, Answer, Choice, Question, Exam, User
+from django.utils import timezone
+from api.models import Participant, Result, Answer, Choice, CorrectionJob, Question, Exam, User
 
 
 @pytest.fixture
@@ -165,3 +166,298 @@ def test_trigger_correction_existing_result(client, create_answers_for_exam):
     result.refresh_from_db()
     assert result.score == 2
     assert result.max_score == 2
+
+
+@pytest.fixture
+def create_second_participant(db, create_exam):
+    """Fixture to create a second participant enrolled in the exam."""
+    user = User.objects.create_user(
+        username="second_user",
+        email="second@example.com",
+        password="password123",
+        role="PARTICIPANT",
+    )
+    participant = Participant.objects.create(user=user)
+    participant.exams.add(create_exam)
+    return participant
+
+
+@pytest.mark.django_db
+def test_trigger_exam_correction(client, create_answers_for_exam, create_second_participant):
+    """Test the correction of every participant of an exam at once."""
+    data = create_answers_for_exam
+    second = create_second_participant
+    Answer.objects.create(
+        participant=second,
+        question=data["questions"][0],
+        choice=data["choices"][data["questions"][0].id][0],
+    )
+    Answer.objects.create(
+        participant=second,
+        question=data["questions"][1],
+        choice=data["choices"][data["questions"][1].id][0],
+    )
+
+    url = f"/api/corrections/exam/{data['exam'].id}/"
+    response = client.post(url)
+    assert response.status_code == 200
+    assert response.json()["participants"] == 2
+    assert response.json()["max_score"] == 2
+
+    first = Result.objects.get(
+        participant=data["participant"], exam=data["exam"])
+    assert first.score == 1
+    assert first.max_score == 2
+    second_result = Result.objects.get(participant=second, exam=data["exam"])
+    assert second_result.score == 2
+
+    # Corrigir novamente atualiza os resultados existentes
+    Answer.objects.filter(
+        participant=data["participant"], question=data["questions"][1]
+    ).update(choice=data["choices"][data["questions"][1].id][0])
+
+    response = client.post(url)
+    assert response.status_code == 200
+    first.refresh_from_db()
+    assert first.score == 2
+    assert Result.objects.filter(exam=data["exam"]).count() == 2
+
+
+@pytest.mark.django_db
+def test_trigger_exam_correction_invalid_exam(client):
+    """Test the exam-wide correction with an invalid exam."""
+    response = client.post("/api/corrections/exam/999/")
+    assert response.status_code == 404
+    assert "Exam not found." in response.json()["error"]
+
+
+@pytest.mark.django_db
+def test_correct_exam_command(create_answers_for_exam):
+    """Test the management command for exam-wide correction."""
+    from django.core.management import call_command
+
+    data = create_answers_for_exam
+    call_command("correct_exam", data["exam"].id)
+
+    result = Result.objects.get(
+        participant=data["participant"], exam=data["exam"])
+    assert result.score == 1
+    assert result.max_score == 2
+
+
+@pytest.mark.django_db
+def test_trigger_correction_invalid_mode(client, create_participant, create_exam):
+    """Test correction process with an invalid mode."""
+    url = f"/api/corrections/{create_participant.id}/exam/{create_exam.id}/?mode=invalid"
+    response = client.post(url)
+    assert response.status_code == 400
+    assert "Invalid mode" in response.json()["error"]
+
+
+@pytest.mark.django_db
+def test_trigger_correction_incremental_without_result(client, create_answers_for_exam):
+    """Test the incremental mode falls back to a full correction."""
+    data = create_answers_for_exam
+    url = f"/api/corrections/{data['participant'].id}/exam/{data['exam'].id}/?mode=incremental"
+
+    response = client.post(url)
+    assert response.status_code == 200
+    assert response.json()["score"] == 1
+    assert Result.objects.filter(
+        participant=data["participant"], exam=data["exam"]).exists()
+
+
+@pytest.mark.django_db
+def test_numpy_grading_backend(client, settings, create_answers_for_exam, create_second_participant):
+    """Test the NumPy grading backend matches the SQL backend."""
+    pytest.importorskip("numpy")
+    from api.answer_key import get_answer_key
+    from api.grading import grade_with_numpy, grade_with_sql
+
+    data = create_answers_for_exam
+    second = create_second_participant
+    exam_id = data["exam"].id
+    answer_key = get_answer_key(exam_id)
+
+    expected = {data["participant"].id: 1, second.id: 0}
+    assert grade_with_sql(exam_id, answer_key) == expected
+    assert grade_with_numpy(exam_id, answer_key) == expected
+    assert grade_with_numpy(exam_id, answer_key, [second.id]) == {second.id: 0}
+
+    settings.EXAM_GRADING_BACKEND = "numpy"
+    url = f"/api/corrections/{data['participant'].id}/exam/{exam_id}/"
+    response = client.post(url)
+    assert response.status_code == 200
+    assert response.json()["score"] == 1
+
+
+@pytest.mark.django_db
+def test_correction_job(client, create_answers_for_exam, create_second_participant):
+    """Test enqueuing a correction job, running it and polling its status."""
+    from django.core.management import call_command
+
+    data = create_answers_for_exam
+    response = client.post(f"/api/corrections/exam/{data['exam'].id}/jobs/")
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "pending"
+    assert job["progress"] == 0
+
+    # Enfileirar novamente reaproveita o job pendente
+    response = client.post(f"/api/corrections/exam/{data['exam'].id}/jobs/")
+    assert response.json()["id"] == job["id"]
+
+    call_command("correction_worker", "--once", "--workers", "0")
+
+    response = client.get(f"/api/corrections/jobs/{job['id']}/")
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "done"
+    assert job["total"] == 2
+    assert job["processed"] == 2
+    assert job["progress"] == 100
+
+    result = Result.objects.get(
+        participant=data["participant"], exam=data["exam"])
+    assert result.score == 1
+    assert Result.objects.filter(exam=data["exam"]).count() == 2
+
+
+@pytest.mark.django_db
+def test_correction_job_invalid_exam(client):
+    """Test enqueuing a correction job for an invalid exam."""
+    response = client.post("/api/corrections/exam/999/jobs/")
+    assert response.status_code == 404
+    assert "Exam not found." in response.json()["error"]
+
+
+@pytest.mark.django_db
+def test_correction_job_not_found(client):
+    """Test polling a correction job that does not exist."""
+    response = client.get("/api/corrections/jobs/999/")
+    assert response.status_code == 404
+    assert "Correction job not found." in response.json()["error"]
+
+
+@pytest.mark.django_db
+def test_grading_scheduler(create_answers_for_exam):
+    """Test the scheduler grades closed exams once across instances."""
+    from django.utils import timezone
+    from api.scheduler import GradingScheduler
+
+    data = create_answers_for_exam
+    data["exam"].refresh_from_db()
+    same_deadline = Exam.objects.create(
+        name="Same Deadline Exam",
+        start_date="2024-01-01T10:00:00Z",
+        end_date="2024-01-02T10:00:00Z",
+    )
+    future = Exam.objects.create(
+        name="Future Exam",
+        start_date="2024-01-01T10:00:00Z",
+        end_date=timezone.now() + timezone.timedelta(days=1),
+    )
+
+    first, second = GradingScheduler(), GradingScheduler()
+    first.refresh()
+    second.refresh()
+    assert first.next_deadline() == data["exam"].end_date
+
+    graded = first.run_due()
+    assert sorted(graded) == sorted([data["exam"].id, same_deadline.id])
+    assert second.run_due() == []
+
+    result = Result.objects.get(
+        participant=data["participant"], exam=data["exam"])
+    assert result.score == 1
+
+    data["exam"].refresh_from_db()
+    future.refresh_from_db()
+    assert data["exam"].graded_at is not None
+    assert future.graded_at is None
+    assert first.next_deadline() == future.end_date
+
+    # Reabrir uma prova libera uma nova correção
+    Exam.objects.filter(id=future.id).update(
+        end_date=timezone.now() - timezone.timedelta(minutes=1))
+    first.refresh()
+    assert first.run_due() == [future.id]
+
+
+@pytest.mark.django_db
+def test_grading_scheduler_failure_leaves_exam_pending(create_answers_for_exam, monkeypatch):
+    """Test an exam whose grading fails is not marked graded and is retried."""
+    from api import scheduler
+
+    exam = create_answers_for_exam["exam"]
+
+    def fail(exam_id):
+        Result.objects.create(participant=create_answers_for_exam["participant"], exam=exam)
+        raise RuntimeError("worker killed")
+
+    monkeypatch.setattr(scheduler, "calculate_exam_results", fail)
+    grading = scheduler.GradingScheduler()
+    grading.refresh()
+    assert grading.run_due() == []
+
+    exam.refresh_from_db()
+    assert exam.graded_at is None
+    assert not Result.objects.filter(exam=exam).exists()
+
+    monkeypatch.undo()
+    grading.refresh()
+    assert grading.run_due() == [exam.id]
+
+
+@pytest.mark.django_db
+def test_correction_job_lease_expires(create_answers_for_exam):
+    """Test a running job abandoned by its worker is queued and claimed again."""
+    from api.jobs import JOB_LEASE_TIMEOUT, claim_next_job, enqueue_correction_job
+
+    exam_id = create_answers_for_exam["exam"].id
+    job = enqueue_correction_job(exam_id)
+    assert claim_next_job().id == job.id
+    assert claim_next_job() is None
+
+    CorrectionJob.objects.filter(pk=job.pk).update(
+        updated_at=timezone.now() - JOB_LEASE_TIMEOUT * 2)
+    requeued = enqueue_correction_job(exam_id)
+    assert requeued.id == job.id
+    assert requeued.status == CorrectionJob.StatusTypes.PENDING
+    assert claim_next_job().id == job.id
+
+
+@pytest.mark.django_db
+def test_stale_worker_cannot_overwrite_reclaimed_job(create_answers_for_exam):
+    """Test a worker that lost its lease does not write progress or status to a re-claimed job."""
+    from api.jobs import JOB_LEASE_TIMEOUT, claim_next_job, enqueue_correction_job, run_correction_job
+
+    exam_id = create_answers_for_exam["exam"].id
+    job = enqueue_correction_job(exam_id)
+    stale = claim_next_job()
+    CorrectionJob.objects.filter(pk=job.pk).update(
+        updated_at=timezone.now() - JOB_LEASE_TIMEOUT * 2)
+    current = claim_next_job()
+    assert current.id == stale.id
+    assert current.started_at != stale.started_at
+
+    stale = run_correction_job(stale)
+    assert stale.status == CorrectionJob.StatusTypes.RUNNING
+    assert stale.processed == 0
+    assert stale.started_at == current.started_at
+
+    current = run_correction_job(current)
+    assert current.status == CorrectionJob.StatusTypes.DONE
+    assert current.processed == 1
+
+
+@pytest.mark.django_db
+def test_correction_job_one_active_per_exam(create_answers_for_exam):
+    """Test the database refuses a second active job for the same exam."""
+    from django.db import IntegrityError, transaction
+
+    exam = create_answers_for_exam["exam"]
+    CorrectionJob.objects.create(exam=exam)
+    with pytest.raises(IntegrityError), transaction.atomic():
+        CorrectionJob.objects.create(exam=exam, status=CorrectionJob.StatusTypes.RUNNING)
+    CorrectionJob.objects.create(exam=exam, status=CorrectionJob.StatusTypes.DONE)
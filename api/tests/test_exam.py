@@ -107,6 +107,42 @@ def test_list_exams_pagination(client, create_exams):
     assert data[1]["name"] == "Exam 2"
 
 
+@pytest.mark.django_db
+def test_list_exams_cursor_pagination(client, create_exams, django_assert_num_queries):
+    """Test walking the exams with cursors, an optional count and no COUNT(*) in page mode."""
+    names = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get(
+            "/api/exams/", {"order": "-name", "page_size": 3, "cursor": cursor, "count": "exact"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 4
+        names += [exam["name"] for exam in data["results"]]
+        cursor = data["next_cursor"]
+    assert names == ["Exam 3", "Exam 2", "Exam 1", "Alpha Exam"]
+
+    with django_assert_num_queries(1):
+        response = client.get("/api/exams/?page=3&page_size=2")
+    assert response.status_code == 400
+    assert response.json()["error"] == "Page number out of range."
+
+    response = client.get("/api/exams/?cursor=invalid")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_list_exams_tampered_cursor(client, create_exams):
+    """Test a well-formed cursor with values of the wrong type is rejected with 400."""
+    from api.pagination import encode_cursor
+
+    for values in (["x", 1], [{"a": 1}, 2], ["2024-01-01T10:00:00Z", "x"]):
+        response = client.get(
+            "/api/exams/", {"order": "start_date", "cursor": encode_cursor(values)})
+        assert response.status_code == 400
+        assert response.json()["error"] == "Invalid cursor."
+
+
 @pytest.mark.django_db
 def test_get_exam(client, create_exam):
     """Test retrieving a single exam by ID."""
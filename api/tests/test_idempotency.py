@@ -0,0 +1,104 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.http import JsonResponse
+from django.test import RequestFactory
+
+from api.cache import BoundedTTLCache
+from api.idempotency import idempotent
+
+
+def make_request(key, body="{}", token="a"):
+    return RequestFactory().post(
+        "/api/answers/",
+        body,
+        content_type="application/json",
+        HTTP_IDEMPOTENCY_KEY=key,
+        HTTP_AUTHORIZATION=f"Bearer {token}",
+    )
+
+
+def test_concurrent_duplicates_run_once():
+    """Test that concurrent requests with the same key are coalesced into one run."""
+    calls = []
+    lock = threading.Lock()
+
+    @idempotent
+    def view(request):
+        with lock:
+            calls.append(request)
+        time.sleep(0.2)
+        return JsonResponse({"calls": len(calls)}, status=201)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        responses = list(executor.map(lambda _: view(make_request("k1")), range(5)))
+
+    assert len(calls) == 1
+    assert {response.status_code for response in responses} == {201}
+    assert {response.content for response in responses} == {b'{"calls": 1}'}
+    assert sum(response.has_header("Idempotent-Replayed") for response in responses) == 4
+
+
+def test_keys_are_scoped_and_bound_to_the_body():
+    """Test that keys are scoped per caller and cannot be replayed with another body."""
+    calls = []
+
+    @idempotent
+    def view(request):
+        calls.append(request)
+        return JsonResponse({}, status=201)
+
+    view(make_request("k2"))
+    view(make_request("k2", token="b"))
+    assert len(calls) == 2
+
+    response = view(make_request("k2", body='{"choice_id": 2}'))
+    assert response.status_code == 422
+    assert len(calls) == 2
+
+
+def test_duplicate_waits_for_a_request_running_elsewhere(monkeypatch):
+    """Test that a duplicate of a request still running in another process gets 409."""
+    from django.core.cache import cache
+    from api import idempotency
+    from api.idempotency import _request_key
+
+    request = make_request("k4")
+    # Lock tomado por outro worker que ainda não terminou
+    cache.add(_request_key(request, "k4") + ":lock", "other", 60)
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_TIMEOUT", 0.1)
+
+    @idempotent
+    def view(request):
+        return JsonResponse({}, status=201)
+
+    assert view(request).status_code == 409
+
+
+def test_server_errors_are_not_stored():
+    """Test that a failed request can be retried with the same key."""
+    statuses = iter([500, 201])
+
+    @idempotent
+    def view(request):
+        return JsonResponse({}, status=next(statuses))
+
+    assert view(make_request("k3")).status_code == 500
+    assert view(make_request("k3")).status_code == 201
+    assert view(make_request("k3")).status_code == 201
+
+
+def test_bounded_ttl_cache_evicts_oldest_and_expired_entries():
+    """Test that the store keeps at most maxsize entries, each for its TTL."""
+    store = BoundedTTLCache(maxsize=2, ttl=60)
+    store.set("a", 1)
+    store.set("b", 2)
+    store.get("a")
+    store.set("c", 3)
+    assert store.get("b") is None
+    assert store.get("a") == 1
+
+    store.set("d", 4, ttl=0)
+    assert store.get("d") is None
+    assert len(store) == 1
@@ -64,3 +64,33 @@ def test_delete_question(client, create_questions):
     assert response.status_code == 200
     assert response.json() == "Question deleted successfully."
     assert not Question.objects.filter(id=question.id).exists()
+
+
+@pytest.mark.django_db
+def test_search_questions_ranks_matches(client, create_exam):
+    """Test that search returns only matching questions, best match first."""
+    Question.objects.bulk_create([
+        Question(exam=create_exam, text="Explain how plants use light during photosynthesis and respiration"),
+        Question(exam=create_exam, text="Cell division"),
+        Question(exam=create_exam, text="Photosynthesis"),
+    ])
+
+    response = client.get("/api/questions/?search=photosynth")
+    assert response.status_code == 200
+    assert [q["text"] for q in response.json()] == [
+        "Photosynthesis",
+        "Explain how plants use light during photosynthesis and respiration",
+    ]
+
+
+@pytest.mark.django_db
+def test_search_questions_follows_updates(client, create_questions):
+    """Test that the search index reflects edited and deleted questions."""
+    first, second = create_questions
+    first.text = "Mitochondria"
+    first.save()
+    second.delete()
+
+    assert [q["text"] for q in client.get("/api/questions/?search=mitochond").json()] == ["Mitochondria"]
+    assert client.get("/api/questions/?search=Question").json() == []
+    assert [q["text"] for q in client.get("/api/questions/?search=it").json()] == ["Mitochondria"]
@@ -33,7 +33,7 @@ def create_participant(db, create_user, create_exam):
 
 
 @pytest.fixture
-def create_results(db, create_exam, create_participant):
+def create_results(db, create_exam, create_participant, django_capture_on_commit_callbacks):
     """Fixture to create results for ranking."""
     from api.models import Participant, User
 
@@ -49,12 +49,14 @@ def create_results(db, create_exam, create_participant):
         )
     )
 
-    Result.objects.create(participant=participant1,
-                          exam=create_exam, score=80, max_score=100)
-    Result.objects.create(participant=participant2,
-                          exam=create_exam, score=90, max_score=100)
-    Result.objects.create(participant=participant3,
-                          exam=create_exam, score=70, max_score=100)
+    # As posições são recalculadas após o commit
+    with django_capture_on_commit_callbacks(execute=True):
+        Result.objects.create(participant=participant1,
+                              exam=create_exam, score=80, max_score=100)
+        Result.objects.create(participant=participant2,
+                              exam=create_exam, score=90, max_score=100)
+        Result.objects.create(participant=participant3,
+                              exam=create_exam, score=70, max_score=100)
 
 
 @pytest.mark.django_db
@@ -141,3 +143,337 @@ def test_ranking_pagination_out_of_range(client, create_results, create_exam):
     response = client.get(url)
     assert response.status_code == 400
     assert "Page number out of range." in response.json()["error"]
+
+
+def _ranks(exam):
+    return dict(
+        Result.objects.filter(exam=exam)
+        .values_list("participant__user__username", "rank")
+    )
+
+
+@pytest.mark.django_db
+def test_ranking_ties_share_rank(client, create_results, create_exam, django_capture_on_commit_callbacks):
+    """Test tied scores share the same rank."""
+    with django_capture_on_commit_callbacks(execute=True):
+        Result.objects.get(participant__user__username="user3").delete()
+        participant = Participant.objects.create(
+            user=User.objects.create_user(
+                username="user4", email="user4@example.com", password="password"
+            )
+        )
+        Result.objects.create(participant=participant,
+                              exam=create_exam, score=80, max_score=100)
+
+    response = client.get(f"/api/rankings/{create_exam.id}/?page_size=5")
+    assert response.status_code == 200
+    ranks = [(r["username"], r["rank"]) for r in response.json()]
+    assert ranks == [("user2", 1), ("participant_user", 2), ("user4", 2)]
+
+
+@pytest.mark.django_db
+def test_ranking_refreshed_after_commit(create_results, create_exam, django_capture_on_commit_callbacks):
+    """Test ranks follow score changes, inserts and deletes once they are committed."""
+    from api.ranking import refresh_exam_ranking
+
+    assert _ranks(create_exam) == {
+        "user2": 1, "participant_user": 2, "user3": 3}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        result = Result.objects.get(participant__user__username="user3")
+        result.score = 95
+        result.save()
+        # Dentro da transação só a linha do próprio participante é escrita
+        assert _ranks(create_exam) == {
+            "user2": 1, "participant_user": 2, "user3": 3}
+    assert _ranks(create_exam) == {
+        "user3": 1, "user2": 2, "participant_user": 3}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        result.score = 80
+        result.save()
+    assert _ranks(create_exam) == {
+        "user2": 1, "participant_user": 2, "user3": 2}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Result.objects.get(participant__user__username="user2").delete()
+    assert _ranks(create_exam) == {"participant_user": 1, "user3": 1}
+
+    expected = _ranks(create_exam)
+    Result.objects.filter(exam=create_exam).update(rank=None)
+    refresh_exam_ranking(create_exam.id)
+    assert _ranks(create_exam) == expected
+
+
+@pytest.mark.django_db
+def test_unranked_result_gets_rank_when_read(client, create_results, create_exam):
+    """Test a result whose ranks are not refreshed yet is still listed with its rank."""
+    Result.objects.filter(participant__user__username="user3").update(score=85, rank=None)
+
+    response = client.get(f"/api/rankings/{create_exam.id}/")
+    ranks = {r["username"]: r["rank"] for r in response.json()}
+    assert ranks["user3"] == 2
+
+
+@pytest.mark.django_db
+def test_ranking_pages_seek_by_rank(client, create_results, create_exam, django_capture_on_commit_callbacks):
+    """Test page mode starts each page from its rank without skipping tied rows."""
+    with django_capture_on_commit_callbacks(execute=True):
+        for i in range(4, 8):
+            participant = Participant.objects.create(
+                user=User.objects.create_user(
+                    username=f"user{i}", email=f"user{i}@example.com", password="password"
+                )
+            )
+            Result.objects.create(participant=participant,
+                                  exam=create_exam, score=80, max_score=100)
+
+    url = f"/api/rankings/{create_exam.id}/?page_size=2"
+    seen = []
+    for page in range(1, 5):
+        data = client.get(f"{url}&page={page}").json()
+        seen.extend((r["username"], r["rank"]) for r in data)
+    expected = list(
+        Result.objects.filter(exam=create_exam)
+        .order_by("rank", "created_at", "id")
+        .values_list("participant__user__username", "rank")
+    )
+    assert seen == expected
+    assert [rank for _, rank in seen] == [1, 2, 2, 2, 2, 2, 7]
+    assert client.get(f"{url}&page=5").status_code == 400
+
+
+@pytest.mark.django_db
+def test_ranking_with_cursor(client, create_results, create_exam):
+    """Test keyset pagination of the ranking with an opaque cursor."""
+    url = f"/api/rankings/{create_exam.id}/?cursor=&page_size=2"
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["username"] for r in data["results"]] == ["user2", "participant_user"]
+    assert [r["rank"] for r in data["results"]] == [1, 2]
+    assert data["next_cursor"]
+
+    url = f"/api/rankings/{create_exam.id}/?cursor={data['next_cursor']}&page_size=2"
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["username"] for r in data["results"]] == ["user3"]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_ranking_cursor_with_ties(client, create_results, create_exam):
+    """Test keyset pagination does not skip or repeat tied scores."""
+    from api.ranking import refresh_exam_ranking
+
+    Result.objects.filter(exam=create_exam).update(score=50)
+    refresh_exam_ranking(create_exam.id)
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        url = f"/api/rankings/{create_exam.id}/?cursor={cursor}&page_size=1"
+        data = client.get(url).json()
+        seen.extend(r["username"] for r in data["results"])
+        cursor = data["next_cursor"]
+    assert sorted(seen) == ["participant_user", "user2", "user3"]
+
+
+@pytest.mark.django_db
+def test_ranking_invalid_cursor(client, create_results, create_exam):
+    """Test keyset pagination with an invalid cursor."""
+    url = f"/api/rankings/{create_exam.id}/?cursor=invalid"
+    response = client.get(url)
+    assert response.status_code == 400
+    assert "Invalid cursor." in response.json()["error"]
+
+    url = f"/api/rankings/{create_exam.id}/?cursor=&order=username"
+    response = client.get(url)
+    assert response.status_code == 400
+    assert "Cursor pagination" in response.json()["error"]
+
+
+@pytest.fixture
+def get_token(create_user):
+    """Generate JWT token for the participant user."""
+    from rest_framework_simplejwt.tokens import RefreshToken
+    return str(RefreshToken.for_user(create_user).access_token)
+
+
+@pytest.mark.django_db
+def test_get_my_rank(client, create_results, create_exam, get_token):
+    """Test retrieving the authenticated participant's rank."""
+    url = f"/api/rankings/{create_exam.id}/me/?neighbours=1"
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {get_token}"}
+    response = client.get(url, **headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["username"] == "participant_user"
+    assert data["rank"] == 2
+    assert data["total"] == 3
+    assert data["percentile"] == 50.0
+    assert [r["username"] for r in data["above"]] == ["user2"]
+    assert [r["username"] for r in data["below"]] == ["user3"]
+    assert [r["rank"] for r in data["above"] + data["below"]] == [1, 3]
+
+
+@pytest.mark.django_db
+def test_get_my_rank_neighbours_bounds(client, create_results, create_exam, get_token):
+    """Test the number of neighbours is validated instead of failing."""
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {get_token}"}
+    for neighbours in (-1, 1000):
+        url = f"/api/rankings/{create_exam.id}/me/?neighbours={neighbours}"
+        assert client.get(url, **headers).status_code == 422
+
+    response = client.get(f"/api/rankings/{create_exam.id}/me/?neighbours=0", **headers)
+    assert response.status_code == 200
+    assert response.json()["above"] == []
+
+
+@pytest.mark.django_db
+def test_get_my_rank_without_result(client, create_participant, create_exam, get_token):
+    """Test retrieving the rank of a participant without a result."""
+    url = f"/api/rankings/{create_exam.id}/me/"
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {get_token}"}
+    response = client.get(url, **headers)
+    assert response.status_code == 404
+    assert "Result not found." in response.json()["error"]
+
+
+@pytest.mark.django_db
+def test_get_my_rank_unauthorized(client, create_exam):
+    """Test retrieving the rank without authorization."""
+    response = client.get(f"/api/rankings/{create_exam.id}/me/")
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_ranking_cache_invalidated_on_result_change(
+    client, create_results, create_exam, django_capture_on_commit_callbacks
+):
+    """Test the cached ranking is refreshed as soon as a result changes."""
+    url = f"/api/rankings/{create_exam.id}/"
+    response = client.get(url)
+    assert response.json()[0]["username"] == "user2"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        result = Result.objects.get(participant__user__username="user3")
+        result.score = 100
+        result.save()
+
+    response = client.get(url)
+    assert response.json()[0]["username"] == "user3"
+    assert response.json()[0]["rank"] == 1
+
+
+@pytest.mark.django_db
+def test_ranking_cache_invalidated_on_user_rename(client, create_results, create_exam, create_user):
+    """Test a renamed user does not stay stale in a cached ranking."""
+    url = f"/api/rankings/{create_exam.id}/"
+    assert client.get(url).json()[1]["username"] == "participant_user"
+
+    user = User.objects.get(pk=create_user.pk)
+    user.save(update_fields=["last_login"])
+    user.username = "renamed_user"
+    user.save()
+
+    assert client.get(url).json()[1]["username"] == "renamed_user"
+
+
+@pytest.mark.django_db
+def test_ranking_cached_before_commit_is_dropped(
+    client, create_results, create_exam, django_capture_on_commit_callbacks
+):
+    """Test a ranking cached from uncommitted data is invalidated at commit."""
+    url = f"/api/rankings/{create_exam.id}/"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        result = Result.objects.get(participant__user__username="user3")
+        result.score = 100
+        result.save()
+        # Leitura concorrente antes do commit, guardada sob a nova versão
+        client.get(url)
+        Result.objects.filter(pk=result.pk).update(score=10)
+
+    assert client.get(url).json()[0]["username"] == "user2"
+
+
+@pytest.mark.django_db
+def test_view_cache_timeout_depends_on_backend(settings):
+    """Test cached views keep the long TTL only with a shared cache."""
+    from api.cache import LOCAL_VIEW_CACHE_TIMEOUT, VIEW_CACHE_TIMEOUT, view_cache_timeout
+
+    assert view_cache_timeout() == LOCAL_VIEW_CACHE_TIMEOUT
+    settings.CACHES = {"default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://localhost:6379",
+    }}
+    assert view_cache_timeout() == VIEW_CACHE_TIMEOUT
+
+
+@pytest.mark.django_db
+def test_export_ranking_csv(client, create_results, create_exam):
+    """Test streaming the ranking as CSV."""
+    response = client.get(f"/api/rankings/{create_exam.id}/export?format=csv")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert lines[0] == "rank,username,score,max_score,percentage"
+    assert lines[1] == "1,user2,90.0,100.0,90.0"
+    assert len(lines) == 4
+
+
+@pytest.mark.django_db
+def test_export_ranking_ndjson(client, create_results, create_exam):
+    """Test streaming the ranking as NDJSON."""
+    import json
+    from api.ranking import refresh_exam_ranking
+
+    Result.objects.filter(participant__user__username="user3").update(score=80)
+    refresh_exam_ranking(create_exam.id)
+    response = client.get(f"/api/rankings/{create_exam.id}/export?format=ndjson")
+    assert response.status_code == 200
+    rows = [
+        json.loads(line)
+        for line in b"".join(response.streaming_content).decode().splitlines()
+    ]
+    assert [r["username"] for r in rows] == ["user2", "participant_user", "user3"]
+    assert [r["rank"] for r in rows] == [1, 2, 2]
+
+
+@pytest.mark.django_db
+def test_export_ranking_invalid(client, create_exam):
+    """Test exporting with an invalid format or exam."""
+    response = client.get(f"/api/rankings/{create_exam.id}/export?format=xml")
+    assert response.status_code == 400
+    response = client.get("/api/rankings/999/export")
+    assert response.status_code == 404
+    assert "Exam not found." in response.json()["error"]
+
+
+@pytest.mark.django_db
+def test_get_ranking_stats(client, create_results, create_exam):
+    """Test the score distribution statistics of an exam."""
+    response = client.get(f"/api/rankings/{create_exam.id}/stats/?buckets=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 3
+    assert data["mean"] == 80
+    assert data["median"] == 80
+    assert data["min"] == 70
+    assert data["max"] == 90
+    assert round(data["std_dev"], 2) == 8.16
+    assert data["percentiles"]["25"] == 75
+    assert data["percentiles"]["90"] == 88
+    assert [b["count"] for b in data["histogram"]] == [0, 0, 0, 1, 2]
+    assert data["histogram"][4] == {"from": 80.0, "to": 100.0, "count": 2}
+
+
+@pytest.mark.django_db
+def test_get_ranking_stats_invalid(client, create_exam):
+    """Test the statistics endpoint with invalid parameters."""
+    response = client.get(f"/api/rankings/{create_exam.id}/stats/?buckets=0")
+    assert response.status_code == 400
+    response = client.get("/api/rankings/999/stats/")
+    assert response.status_code == 404
+    assert "Exam not found." in response.json()["error"]
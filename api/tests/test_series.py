@@ -0,0 +1,131 @@
+import pytest
+from api.models import Exam, ExamSeries, Participant, Result, SeriesStanding, User
+
+
+@pytest.fixture
+def create_exams(db):
+    """Fixture to create two exams of a series."""
+    return [
+        Exam.objects.create(
+            name=f"Series Exam {i}",
+            start_date="2024-01-01T10:00:00Z",
+            end_date="2024-01-02T10:00:00Z",
+        )
+        for i in (1, 2)
+    ]
+
+
+@pytest.fixture
+def create_participants(db):
+    """Fixture to create three participants."""
+    return [
+        Participant.objects.create(
+            user=User.objects.create_user(
+                username=f"user{i}", email=f"user{i}@example.com", password="password"
+            )
+        )
+        for i in (1, 2, 3)
+    ]
+
+
+@pytest.fixture
+def create_results(db, create_exams, create_participants):
+    """Fixture to create results in both exams."""
+    scores = {0: (5, 5), 1: (8, 1), 2: (3, 3)}
+    for index, (first, second) in scores.items():
+        Result.objects.create(participant=create_participants[index],
+                              exam=create_exams[0], score=first, max_score=10)
+        Result.objects.create(participant=create_participants[index],
+                              exam=create_exams[1], score=second, max_score=10)
+
+
+@pytest.fixture
+def create_series(db, create_exams, create_results):
+    """Fixture to create a series over both exams."""
+    series = ExamSeries.objects.create(name="Series")
+    series.exams.set(create_exams)
+    return series
+
+
+def _totals(series):
+    return dict(
+        SeriesStanding.objects.filter(series=series)
+        .values_list("participant__user__username", "total_score")
+    )
+
+
+@pytest.mark.django_db
+def test_create_series(client, create_exams, create_results):
+    """Test creating a series builds its standings."""
+    url = "/api/series/"
+    payload = {"name": "Series", "exam_ids": [e.id for e in create_exams]}
+    response = client.post(url, payload, content_type="application/json")
+    assert response.status_code == 201
+    data = response.json()
+    assert sorted(data["exam_ids"]) == sorted(e.id for e in create_exams)
+
+    series = ExamSeries.objects.get(id=data["id"])
+    assert _totals(series) == {"user1": 10, "user2": 9, "user3": 6}
+
+    response = client.post(url, payload, content_type="application/json")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_series_standings_updated_incrementally(create_series, create_exams):
+    """Test series totals follow result changes."""
+    result = Result.objects.get(
+        participant__user__username="user3", exam=create_exams[1])
+    result.score = 10
+    result.save()
+    assert _totals(create_series) == {"user1": 10, "user2": 9, "user3": 13}
+
+    result.delete()
+    assert _totals(create_series)["user3"] == 3
+
+    create_exams[0].delete()
+    assert _totals(create_series) == {"user1": 5, "user2": 1}
+
+
+@pytest.mark.django_db
+def test_get_series_ranking(client, create_series):
+    """Test the series leaderboard with page and cursor pagination."""
+    url = f"/api/series/{create_series.id}/ranking/"
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert [(r["username"], r["rank"]) for r in data] == [
+        ("user1", 1), ("user2", 2), ("user3", 3)]
+    assert data[0]["percentage"] == 50.0
+
+    response = client.get(f"{url}?cursor=&page_size=2")
+    data = response.json()
+    assert [r["username"] for r in data["results"]] == ["user1", "user2"]
+
+    response = client.get(f"{url}?cursor={data['next_cursor']}&page_size=2")
+    data = response.json()
+    assert [(r["username"], r["rank"]) for r in data["results"]] == [("user3", 3)]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_get_series_not_found(client):
+    """Test retrieving a series that does not exist."""
+    assert client.get("/api/series/999/").status_code == 404
+    assert client.get("/api/series/999/ranking/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_delete_participant_in_series(client, create_series, create_participants):
+    """Test deleting a participant or user with series results removes their standings."""
+    from django.db import connection
+
+    participant, other = create_participants[0], create_participants[1]
+    response = client.delete(f"/api/participants/{participant.id}/")
+    assert response.status_code == 200
+    response = client.delete(f"/api/users/{other.user_id}/")
+    assert response.status_code == 200
+
+    # As chaves estrangeiras do SQLite só são verificadas no commit
+    connection.check_constraints()
+    assert _totals(create_series) == {"user3": 6}
@@ -161,3 +161,20 @@ def test_delete_user_not_found(client):
     response = client.delete(url)
     assert response.status_code == 404
     assert response.json()["error"] == "User not found."
+
+
+@pytest.mark.django_db
+def test_list_users_cache_invalidated_on_write(client, create_user):
+    """Test the cached user list is refreshed as soon as a user changes."""
+    url = "/api/users/"
+    response = client.get(url)
+    assert [u["username"] for u in response.json()] == ["testuser"]
+
+    User.objects.create_user(username="newuser", email="new@example.com")
+    response = client.get(url)
+    assert len(response.json()) == 2
+
+    create_user.first_name = "Renamed"
+    create_user.save()
+    response = client.get(url)
+    assert "Renamed" in [u["first_name"] for u in response.json()]
@@ -0,0 +1,170 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import repeat
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.enrollment import enrollment_version, enrollment_versions, get_enrolled_exam_ids
+from api.models import Participant
+
+# Participantes com mais provas que isso não levam a lista no token
+EXAM_IDS_CLAIM_MAX = 100
+# Tolerância para relógios adiantados ao aceitar tokens antes do início da prova
+COHORT_TOKEN_NBF_SKEW = timedelta(minutes=5)
+
+
+def issue_tokens(user, refresh: RefreshToken = None) -> dict:
+    """
+    Issue an access token for a user, and a refresh token unless one is given.
+
+    Besides the user id, the tokens carry the user's role, participant id and,
+    when short enough, the ids of the exams they are enrolled in. The
+    enrollment version stamped alongside lets readers detect stale claims.
+    """
+    if refresh is None:
+        refresh = RefreshToken.for_user(user)
+    refresh["role"] = user.role
+
+    participant_id = (
+        Participant.objects.filter(user=user).values_list("id", flat=True).first()
+    )
+    refresh["participant_id"] = participant_id
+    refresh.payload.pop("enrollment_version", None)
+    refresh.payload.pop("exam_ids", None)
+    if participant_id is not None:
+        refresh["enrollment_version"] = enrollment_version(participant_id)
+        exam_ids = get_enrolled_exam_ids(participant_id)
+        if len(exam_ids) <= EXAM_IDS_CLAIM_MAX:
+            refresh["exam_ids"] = sorted(exam_ids)
+
+    return {
+        "access": str(refresh.access_token),
+        "refresh": str(refresh),
+    }
+
+
+def sign_cohort_tokens(rows: list, claims: dict, access_exp: int, refresh_exp: int) -> list:
+    """
+    Sign an access/refresh token pair for each participant row.
+
+    Only signs tokens and never touches the database, so chunks can run in
+    worker processes.
+    """
+    tokens = []
+    for row in rows:
+        refresh = RefreshToken()
+        refresh[jwt_settings.USER_ID_CLAIM] = row["user_id"]
+        refresh["role"] = row["role"]
+        refresh["participant_id"] = row["id"]
+        refresh["enrollment_version"] = row["enrollment_version"]
+        for claim, value in claims.items():
+            refresh[claim] = value
+        refresh["exp"] = refresh_exp
+
+        access = refresh.access_token
+        access["exp"] = access_exp
+        tokens.append({
+            "participant_id": row["id"],
+            "username": row["username"],
+            "access": str(access),
+            "refresh": str(refresh),
+        })
+    return tokens
+
+
+def issue_cohort_tokens(exam, workers: int = 0, chunk_size: int = 500) -> list:
+    """
+    Pre-issue exam-scoped token pairs for every participant enrolled in an exam.
+
+    Lets the cohort skip the password hash of ``login`` at exam start. Both
+    tokens carry an ``nbf`` claim ``COHORT_TOKEN_NBF_SKEW`` before the exam
+    start, so tokens handed out early are refused until then. Access tokens
+    only grant that exam and last ``ACCESS_TOKEN_LIFETIME`` from the exam
+    start (or from now, if it already started), never past its end; clients
+    then use the refresh endpoint, which keeps the exam scope. Refresh
+    tokens last ``REFRESH_TOKEN_LIFETIME`` past the end. Tokens are signed
+    on a pool of ``workers`` processes when there is more than one chunk, or
+    in the current process otherwise.
+    """
+    if exam.end_date <= timezone.now():
+        raise ValueError("Exam has already ended.")
+
+    rows = list(
+        Participant.objects.filter(exams=exam.id)
+        .order_by("id")
+        .values("id", "user_id", role=F("user__role"), username=F("user__username"))
+    )
+    versions = enrollment_versions([row["id"] for row in rows])
+    for row in rows:
+        row["enrollment_version"] = versions[row["id"]]
+
+    # Tokens de acesso não podem ser revogados: só valem a partir do início
+    # da prova e pelo tempo normal
+    claims = {
+        "exam_ids": [exam.id],
+        "exam_scope": exam.id,
+        "nbf": int((exam.start_date - COHORT_TOKEN_NBF_SKEW).timestamp()),
+    }
+    access_start = max(exam.start_date, timezone.now())
+    access_exp = int(min(
+        exam.end_date, access_start + jwt_settings.ACCESS_TOKEN_LIFETIME).timestamp())
+    refresh_exp = int((exam.end_date + jwt_settings.REFRESH_TOKEN_LIFETIME).timestamp())
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+    if workers and len(chunks) > 1:
+        # As conexões não podem ser compartilhadas com os processos filhos
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            signed = pool.map(
+                sign_cohort_tokens, chunks,
+                repeat(claims), repeat(access_exp), repeat(refresh_exp))
+            return [pair for chunk in signed for pair in chunk]
+
+    return [
+        pair for chunk in chunks
+        for pair in sign_cohort_tokens(chunk, claims, access_exp, refresh_exp)
+    ]
+
+
+class ClaimsUser(TokenUser):
+    """
+    A user backed by the claims of a validated access token.
+
+    ``id`` and ``role`` are read from the token. Any
+    other attribute loads the ``User`` row on first access, once per request.
+    """
+
+    @cached_property
+    def user(self):
+        return get_user_model().objects.get(pk=self.id)
+
+    @cached_property
+    def role(self) -> str:
+        if "role" in self.token:
+            return self.token["role"]
+        return self.user.role
+
+    @cached_property
+    def username(self) -> str:
+        return self.user.username
+
+    @cached_property
+    def is_staff(self) -> bool:
+        return self.user.is_staff
+
+    @cached_property
+    def is_superuser(self) -> bool:
+        return self.user.is_superuser
+
+    def __getattr__(self, attr: str):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.user, attr)
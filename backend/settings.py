@@ -47,8 +47,17 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_USER_CLASS": "api.tokens.ClaimsUser",
 }
 
+# Authenticate API requests from the access token claims alone, without
+# loading the User row (it is fetched lazily if a view needs it)
+STATELESS_JWT_AUTH = os.environ.get("STATELESS_JWT_AUTH", "false").lower() == "true"
+
+# Processes signing the tokens pre-issued by POST /api/auth/cohort/{exam_id}
+# (0 signs them in the request's process)
+COHORT_TOKEN_WORKERS = int(os.environ.get("COHORT_TOKEN_WORKERS", os.cpu_count() or 0))
+
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -103,14 +112,38 @@ DATABASES = {
     }
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # A file-backed SQLite test database lets the concurrency tests open one
+    # connection per thread; the in-memory default is private to each one.
+    DATABASES['default']['TEST'] = {'NAME': BASE_DIR / 'test_db.sqlite3'}
+
+# The versioned caches (views, answer keys, enrollments, idempotency keys) are
+# invalidated across the web, worker and scheduler processes only when they
+# share the cache: point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached in
+# production. With the local-memory default, cached views use a short TTL.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': os.environ.get(
+            "CACHE_BACKEND", 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get("CACHE_LOCATION", 'unique-snowflake'),
     }
 }
 
 
+# Exam scoring
+# Keep each participant's Result up to date on every answer write, so that
+# correction can read the stored score instead of rescanning every answer.
+INCREMENTAL_SCORING = True
+
+# Engine used to grade answers: "sql" (aggregate query) or "numpy"
+# (vectorized, requires the optional numpy dependency)
+EXAM_GRADING_BACKEND = os.environ.get("EXAM_GRADING_BACKEND", "sql")
+
+# Queue answer writes in a pending log and acknowledge them at once; the
+# flush_answers command applies them in batches (for exam-start spikes)
+ANSWER_WRITE_BEHIND = os.environ.get("ANSWER_WRITE_BEHIND", "false").lower() == "true"
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 